@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compare the ISO 8601 scanner with the old strptime based extraction.
+
+Run from the repository root:
+
+    python benchmarks/bench_iso.py
+"""
+
+import re
+import sys
+import random
+import datetime
+import timeit
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from chronos.extractor import ISO8601Extractor
+
+
+# The pattern and strptime formats used before the scanner
+legacy_pattern = re.compile(r"(\d{4}\-\d\d\-\d\d([tT][\d:\.]*)?)")
+legacy_formats = {10: "%Y-%m-%d",
+                  13: "%Y-%m-%dT%H",
+                  16: "%Y-%m-%dT%H:%M",
+                  19: "%Y-%m-%dT%H:%M:%S",
+                  }
+
+
+def legacy_extract(text):
+    result = []
+    for match in legacy_pattern.findall(text):
+        fmt = legacy_formats.get(len(match[0]))
+        if fmt:
+            result.append(datetime.datetime.strptime(match[0], fmt))
+    return result
+
+
+def log_lines(count, seed=42):
+    """Log-like lines, each starting with a timestamp the old path can read."""
+    rng = random.Random(seed)
+    start = datetime.datetime(2013, 1, 1)
+    lines = []
+    for i in range(count):
+        stamp = start + datetime.timedelta(seconds=rng.randint(0, 10 ** 8))
+        level = rng.choice(['INFO', 'WARN', 'ERROR', 'DEBUG'])
+        lines.append('%s %s worker-%d handled request %d in %dms'
+                     % (stamp.strftime('%Y-%m-%dT%H:%M:%S'), level,
+                        rng.randint(1, 32), i, rng.randint(1, 900)))
+    return lines
+
+
+def main(count=20000, repeat=3):
+    lines = log_lines(count)
+    extractor = ISO8601Extractor()
+    assert [extractor.extract(l) for l in lines] == [legacy_extract(l) for l in lines]
+
+    for name, func in [('strptime', legacy_extract), ('scanner', extractor.extract)]:
+        best = min(timeit.repeat(lambda: [func(l) for l in lines],
+                                 number=1, repeat=repeat))
+        print('%-10s %10.0f lines/sec' % (name, count / best))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Throughput of one shared parser over a pool of threads.
+
+Parses the same corpus with `Parser.parse_many` on 1, 2, 4 ... threads. With
+the GIL the threads take turns and the speedup stays around 1x; run it again
+on a free-threaded build (python3.13t or later) to see them scale. Run from
+the repository root:
+
+    python benchmarks/bench_threads.py
+    python3.13t -X gil=0 benchmarks/bench_threads.py
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import corpus
+from chronos import Parser
+
+
+def gil_enabled():
+    """Whether the GIL is on, always True before Python 3.13."""
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_enabled is None else is_enabled()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=20000,
+                        help='strings of the corpus')
+    parser.add_argument('--kind', default='mixed', choices=corpus.KINDS)
+    parser.add_argument('--max-threads', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per thread count, the best one is kept')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    texts = corpus.generate(args.kind, args.count, args.seed)
+    chronos = Parser().warmup()
+    expected = chronos.parse_many(texts)
+
+    print('python %s, GIL %s' % (sys.version.split()[0],
+                                 'enabled' if gil_enabled() else 'disabled'))
+    print('%-8s %14s %8s' % ('threads', 'strings/sec', 'speedup'))
+    threads = 1
+    single = None
+    while threads <= args.max_threads:
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = chronos.parse_many(texts, threads=threads)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        assert result == expected
+        if single is None:
+            single = best
+        print('%-8d %14.0f %7.2fx' % (threads, len(texts) / best, single / best))
+        threads *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Seeded generator of synthetic text for the benchmarks.
+
+Every kind of text is generated from a fixed seed so two runs, possibly on
+different versions of chronos, parse exactly the same corpus.
+"""
+
+import random
+import datetime
+
+
+WORDS = ('the a of to and in is it you that he was for on are with as his they '
+         'be at one have this from or had by hot word but what some we can out '
+         'other were all there when up use your how said an each she which do '
+         'their time if will way about many then them write would like so these '
+         'her long make thing see him two has look more could go come did number '
+         'sound no most people my over know water than call first who may down '
+         'side been now find any new work part take get place made live where '
+         'after back little only round man year came show every good me give '
+         'our under name very through just form sentence great think say help '
+         'low line differ turn cause much mean before move right boy old too '
+         'same tell does set three want air well also play small end put home '
+         'read hand port large spell add even land here must big high such').split()
+
+HOLIDAYS = ['christmas', 'Christmas eve', 'new year', "New Year's eve",
+            'newyears', 'christmas Eve']
+
+RELATIVE = ['today', 'tomorrow', 'yesterday', 'day before yesterday',
+            'day after tomorrow', 'in 3 days', '10 days ago', 'a week back',
+            'in 2 weeks', 'next month', 'last year', 'next friday',
+            'last Monday', 'in a month', '2 years ago', 'next week']
+
+KINDS = ['none', 'holiday', 'iso', 'relative', 'long', 'mixed']
+
+
+def sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def timestamp(rng):
+    stamp = datetime.datetime(2000, 1, 1) + datetime.timedelta(seconds=rng.randint(0, 10 ** 9))
+    form = rng.randint(0, 5)
+    if form == 0:
+        return stamp.strftime('%Y-%m-%d')
+    elif form == 1:
+        return stamp.strftime('%Y-%m-%dT%H:%M')
+    elif form == 2:
+        return stamp.strftime('%Y-%m-%dT%H:%M:%S.%f')[:23] + 'Z'
+    elif form == 3:
+        return stamp.strftime('%Y%m%dT%H%M%S+0530')
+    return stamp.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def with_phrase(rng, phrase):
+    words = sentence(rng, rng.randint(4, 16)).split()
+    words.insert(rng.randint(0, len(words)), phrase)
+    return ' '.join(words)
+
+
+def generate(kind, count, seed=1):
+    """Return count strings of the given kind."""
+    rng = random.Random('%s-%d' % (kind, seed))
+    texts = []
+    for _ in range(count):
+        if kind == 'none':
+            texts.append(sentence(rng, rng.randint(4, 20)))
+        elif kind == 'holiday':
+            texts.append(with_phrase(rng, rng.choice(HOLIDAYS)))
+        elif kind == 'iso':
+            texts.append('%s %s' % (timestamp(rng), sentence(rng, rng.randint(4, 12))))
+        elif kind == 'relative':
+            texts.append(with_phrase(rng, rng.choice(RELATIVE)))
+        elif kind == 'long':
+            parts = []
+            for _ in range(rng.randint(100, 200)):
+                roll = rng.random()
+                if roll < 0.03:
+                    parts.append(rng.choice(RELATIVE))
+                elif roll < 0.05:
+                    parts.append(timestamp(rng))
+                elif roll < 0.06:
+                    parts.append(rng.choice(HOLIDAYS))
+                else:
+                    parts.append(sentence(rng, rng.randint(3, 12)) + '.')
+            texts.append(' '.join(parts))
+        elif kind == 'mixed':
+            # Mostly text without dates, as seen in production traffic
+            texts.extend(generate(rng.choice(['none'] * 6 + KINDS[1:4]), 1,
+                                  rng.randint(0, 10 ** 9)))
+        else:
+            raise ValueError("unknown corpus kind %r" % kind)
+    return texts
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Throughput and latency benchmarks for chronos.
+
+Parses every kind of synthetic corpus end to end and with each extractor on
+its own, reporting strings/sec and p50/p99 latency per string. Run from the
+repository root:
+
+    python benchmarks/run.py --save benchmarks/baseline.json
+    # ... change things ...
+    python benchmarks/run.py --compare benchmarks/baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import corpus
+from chronos import Parser
+from chronos.extractor import extractor_names
+
+
+TARGETS = [('all', None)] + [(name, [name]) for name in extractor_names()]
+
+# Long documents are much slower, use fewer of them
+SIZES = {'long': 0.02}
+
+
+def percentile(values, fraction):
+    """Nearest rank percentile of an already sorted list."""
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def measure(parser, texts, repeat):
+    """Return strings/sec and latency percentiles of the best run."""
+    parse = parser.parse
+    timer = time.perf_counter
+    best = None
+    for _ in range(repeat):
+        latencies = []
+        append = latencies.append
+        for text in texts:
+            start = timer()
+            parse(text)
+            append(timer() - start)
+        total = sum(latencies)
+        if best is None or total < best[0]:
+            best = (total, latencies)
+
+    total, latencies = best
+    latencies.sort()
+    return {'strings_per_sec': len(texts) / total,
+            'p50_us': percentile(latencies, 0.50) * 1e6,
+            'p99_us': percentile(latencies, 0.99) * 1e6,
+            }
+
+
+def run(count, repeat, seed, kinds, targets, tokenize=False):
+    results = {}
+    for kind in kinds:
+        texts = corpus.generate(kind, max(1, int(count * SIZES.get(kind, 1))), seed)
+        for name, extractors in TARGETS:
+            if targets and name not in targets:
+                continue
+            parser = Parser(extractors, tokenize=tokenize).warmup()
+            results['%s/%s' % (kind, name)] = measure(parser, texts, repeat)
+    return results
+
+
+def report(results, baseline=None):
+    header = '%-22s %14s %10s %10s' % ('benchmark', 'strings/sec', 'p50 us', 'p99 us')
+    if baseline:
+        header += '   %8s' % 'change'
+    print(header)
+    for key in sorted(results):
+        row = results[key]
+        line = '%-22s %14.0f %10.2f %10.2f' % (key, row['strings_per_sec'],
+                                               row['p50_us'], row['p99_us'])
+        if baseline and key in baseline:
+            old = baseline[key]['strings_per_sec']
+            line += '   %+7.1f%%' % ((row['strings_per_sec'] - old) / old * 100)
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=5000,
+                        help='strings per corpus kind')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per benchmark, the best one is kept')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--kind', action='append', choices=corpus.KINDS,
+                        help='corpus kinds to run, all by default')
+    parser.add_argument('--target', action='append',
+                        choices=[name for name, _ in TARGETS],
+                        help='extractors to run, all by default')
+    parser.add_argument('--tokenize', action='store_true',
+                        help='match phrases over tokens instead of regexes')
+    parser.add_argument('--save', metavar='FILE',
+                        help='store the results as a baseline')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='show the change against a stored baseline')
+    args = parser.parse_args(argv)
+
+    results = run(args.count, args.repeat, args.seed,
+                  args.kind or corpus.KINDS, args.target, args.tokenize)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    report(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': sys.version,
+                       'count': args.count,
+                       'seed': args.seed,
+                       'results': results,
+                       }, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+from .api import parse, parse_iter, parse_first, parse_many, parse_parallel, \
+    parse_stream, parse_matches, parse_columnar, parse_array, parse_symbolic, \
+    resolve, parse_at_refs, Match
+from .parser import Parser, ParseResult
+from .session import Session
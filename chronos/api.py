@@ -2,20 +2,86 @@
 # -*- coding: utf-8 -*-
 
 from .extractor import *
+from .parser import Parser
+from .matcher import Match
+from .symbolic import resolve
 
 
-def parse(text, ref=None):
+default_parser = Parser()
+
+
+def parse(text, ref=None, max_results=None, budget_ms=None, deadline=None):
     """Parse a string and return list of dictionaries with date & time info."""
-    if not text:
-        return []
+    return default_parser.parse(text, ref, max_results, budget_ms, deadline)
+
+
+def parse_iter(text, ref=None, spans=False):
+    """Yield the dates & times of a string lazily, in text order."""
+    return default_parser.parse_iter(text, ref, spans)
+
+
+def parse_first(text, ref=None):
+    """Return the first date or time of a string, None if there is none."""
+    return default_parser.parse_first(text, ref)
+
+
+def parse_many(texts, ref=None, threads=None):
+    """Parse an iterable of strings against one ref, returning a list per string."""
+    return default_parser.parse_many(texts, ref, threads)
+
+
+def parse_columnar(texts, ref=None):
+    """Parse an iterable of strings into array backed `Columns` of matches."""
+    return default_parser.parse_columnar(texts, ref)
+
+
+def parse_array(values, ref=None, first=False):
+    """Parse a list, NumPy array or pandas Series once per distinct value."""
+    from .vectorized import parse_array
+    return parse_array(values, ref, first, default_parser)
+
+
+def parse_at_refs(texts, refs):
+    """Match once and resolve for every reference, a ref x match matrix per text."""
+    from .vectorized import parse_at_refs
+    return parse_at_refs(texts, refs, default_parser)
+
+
+def parse_parallel(texts, ref=None, workers=None, chunksize=1000, extractors=None):
+    """Parse an iterable of strings on a pool of processes, yielding in order."""
+    # multiprocessing is only imported by the callers who need it
+    from .parallel import parse_parallel
+    return parse_parallel(texts, ref, workers, chunksize, extractors)
+
+
+def parse_matches(text, ref=None):
+    """Parse a string and return a list of `Match` with positions, in text order."""
+    return default_parser.parse_matches(text, ref)
+
+
+def parse_symbolic(text):
+    """Parse a string into reference independent symbols, see `resolve`."""
+    return default_parser.parse_symbolic(text)
+
+
+def parse_stream(fileobj, ref=None, chunk_size=65536, overlap=256, spans=False):
+    """Parse a file-like object incrementally, yielding dates in text order."""
+    return default_parser.parse_stream(fileobj, ref, chunk_size, overlap, spans)
+
+
+def set_cache_size(cache_size):
+    """Memoize the results of `parse` in an LRU cache of that many entries.
+
+    Pass 0 to turn caching off again.
+    """
+    default_parser.set_cache_size(cache_size)
 
-    extractors = [e(ref) for e in Extractor.__subclasses__()]
 
-    result = []
-    for extractor in extractors:
-        out = extractor.extract(text)
-        if out:
-            result.extend(out)
+def cache_info():
+    """Return hit/miss statistics of the `parse` cache, None if disabled."""
+    return default_parser.cache_info()
 
-    return result
 
+def set_instrument(instrument):
+    """Record timings of `parse` into an `Instrumentation`, None to stop."""
+    default_parser.set_instrument(instrument)
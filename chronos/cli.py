@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Extract dates from lines of text or JSONL records on the command line.
+
+Reads every file given (or stdin) line by line and writes one JSONL record
+or CSV row per input line with the dates found in it:
+
+    python -m chronos --ref 2013-11-20 messages.txt > dates.jsonl
+    zcat huge.log.gz | python -m chronos --workers 8 --format csv --stats
+"""
+
+import io
+import sys
+import csv
+import json
+import time
+import itertools
+import argparse
+import collections
+
+from .parser import Parser
+from .extractor import parse_iso8601, extractor_names
+
+
+def read_lines(paths):
+    """Yield every line of the files, stdin for none or '-'."""
+    for path in paths or ['-']:
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8',
+                                      errors='replace')
+        else:
+            stream = io.open(path, encoding='utf-8', errors='replace')
+        try:
+            for line in stream:
+                yield line.rstrip('\r\n')
+        finally:
+            if path != '-':
+                stream.close()
+
+
+def warn(number, message):
+    sys.stderr.write('chronos: line %d: %s\n' % (number, message))
+
+
+def read_records(lines, input_format, field):
+    """Yield (number, record, text) for every record, the record is None
+    for plain text and number is the line of the input it was read from.
+
+    JSON lines which are not an object are reported on stderr and give a
+    record without text, as do fields which are not strings, so one bad
+    record does not stop a whole pipeline.
+    """
+    for number, line in enumerate(lines, 1):
+        if input_format == 'jsonl':
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                warn(number, 'invalid JSON, no dates (%s)' % e)
+                yield number, None, None
+                continue
+            if not isinstance(record, dict):
+                warn(number, 'not a JSON object, no dates')
+                yield number, None, None
+                continue
+            text = record.get(field)
+            yield number, record, text if isinstance(text, str) else None
+        else:
+            yield number, None, line
+
+
+def serialize(value):
+    return value.isoformat()
+
+
+class Writer(object):
+    """Buffers output rows and writes them out in bulk."""
+
+    def __init__(self, stream, output_format, field, buffer_size=1000):
+        self.stream = stream
+        self.output_format = output_format
+        self.field = field
+        self.buffer_size = buffer_size
+        self.buffer = io.StringIO()
+        self.rows = 0
+        if output_format == 'csv':
+            self.csv = csv.writer(self.buffer, lineterminator='\n')
+            self.csv.writerow(['line', 'date'])
+
+    def write(self, number, record, dates):
+        dates = [serialize(date) for date in dates]
+        if self.output_format == 'csv':
+            for date in dates:
+                self.csv.writerow([number, date])
+        else:
+            if record is None:
+                record = {'line': number}
+            record[self.field] = dates
+            self.buffer.write(json.dumps(record))
+            self.buffer.write('\n')
+
+        self.rows += 1
+        if self.rows >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.stream.write(self.buffer.getvalue())
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.rows = 0
+        self.stream.flush()
+
+
+def parse_records(records, ref, workers, chunksize, extractors):
+    """Yield (number, record, dates) for every record, in input order."""
+    if workers > 1:
+        # Keep the records waiting for their results, the pool only sees text
+        from .parallel import parse_parallel
+        waiting = collections.deque()
+
+        def texts():
+            for number, record, text in records:
+                waiting.append((number, record))
+                yield text
+
+        for dates in parse_parallel(texts(), ref, workers, chunksize, extractors):
+            number, record = waiting.popleft()
+            yield number, record, dates
+    else:
+        parser = Parser(extractors).warmup()
+        while True:
+            batch = list(itertools.islice(records, chunksize))
+            if not batch:
+                return
+            results = parser.parse_many([text for _, _, text in batch], ref)
+            for (number, record, _), dates in zip(batch, results):
+                yield number, record, dates
+
+
+def parse_ref(value):
+    ref = parse_iso8601(value)
+    if ref is None:
+        raise argparse.ArgumentTypeError("not an ISO 8601 date: %r" % value)
+    return ref
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m chronos',
+                                     description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='*', metavar='FILE',
+                        help="files to read, stdin if none or '-'")
+    parser.add_argument('--ref', type=parse_ref,
+                        help='reference date for relative dates, in ISO 8601, today by default')
+    parser.add_argument('--input-format', choices=['text', 'jsonl'], default='text',
+                        help='plain text lines or JSON records, one per line')
+    parser.add_argument('--field', default='text',
+                        help='field of the JSON records holding the text')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl',
+                        help='output format')
+    parser.add_argument('--output-field', default='dates',
+                        help='field added to the JSON output with the dates')
+    parser.add_argument('--extractor', action='append', dest='extractors',
+                        choices=extractor_names(),
+                        help='only use this extractor, may be repeated')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes to parse with')
+    parser.add_argument('--chunksize', type=int, default=1000,
+                        help='lines handed out to a worker at a time')
+    parser.add_argument('--buffer', type=int, default=1000,
+                        help='output rows written at a time')
+    parser.add_argument('--stats', action='store_true',
+                        help='print a throughput summary to stderr')
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    lines = dates_found = 0
+    out = Writer(sys.stdout, args.format, args.output_field, args.buffer)
+    records = read_records(read_lines(args.files), args.input_format, args.field)
+    try:
+        try:
+            for number, record, dates in parse_records(records, args.ref, args.workers,
+                                                       args.chunksize, args.extractors):
+                lines += 1
+                dates_found += len(dates)
+                out.write(number, record, dates)
+        finally:
+            # Rows parsed before an error are not lost
+            out.flush()
+    except BrokenPipeError:
+        # The reader went away, e.g. piped into head
+        sys.stderr.close()
+        return 1
+
+    if args.stats:
+        elapsed = time.time() - start
+        sys.stderr.write('%d lines, %d dates in %.2fs, %.0f lines/sec\n'
+                         % (lines, dates_found, elapsed, lines / elapsed if elapsed else 0))
+    return 0
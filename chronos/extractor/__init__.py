@@ -1,7 +1,24 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import importlib
+
 from .base import *
-from .holiday_extractor import *
-from .iso_extractor import *
-from .relative_day_extractor import *
+from .registry import *
+
+
+# Extractor modules are only imported when one of their names is looked up
+lazy_attributes = {'HolidayExtractor': 'holiday_extractor',
+                   'ChristmasExtractor': 'holiday_extractor',
+                   'NewYearExtractor': 'holiday_extractor',
+                   'ISO8601Extractor': 'iso_extractor',
+                   'parse_iso8601': 'iso_extractor',
+                   'RelativeDayExtractor': 'relative_day_extractor',
+                   }
+
+
+def __getattr__(name):
+    module = lazy_attributes.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    return getattr(importlib.import_module('.' + module, __name__), name)
@@ -1,21 +1,77 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from chronos.reference import reference_day
+
 
 class Extractor(object):
     """Base class for all extractors
 
-    Create a subclass of this Extractor class and implement the extract method.
-    Should return a list of extracted result.
+    Create a subclass of this Extractor class and either implement the extract
+    method or list its patterns in `rules`. Should return a list of extracted
+    result. An extract(self, text) without a context reads `ref` instead;
+    parsers then build a new instance with the reference of every call.
+
+    `rules` is a list of (compiled pattern, handler) pairs. Every handler is
+    called with a single match, shaped like an item returned by `findall`,
+    and the `ReferenceDay` of the call, and returns the extracted value or
+    None to drop the match. Patterns are merged with the other rules of
+    the extractor, so they may not use named groups or backreferences.
+    Extractors keep no state of their own between calls, so a single
+    instance can be shared by threads parsing against different reference
+    dates.
+
+    `triggers` lists lowercase words of which at least one must be present in
+    the text for any of the rules to match. Parsers skip an extractor when
+    none of them are found; leave it empty to always run the extractor.
+
+    `token_rules` optionally lists the same rules as (phrase, handler) pairs
+    matched over tokens instead of characters, used by parsers built with
+    `tokenize`. See `chronos.tokens.parse_phrase` for the phrase syntax;
+    handlers get the lowercased words of the phrase shaped like a `findall`
+    item with a group per element, '' for skipped optional ones.
+
+    `symbol_rules` optionally lists the same patterns with handlers which
+    return a reference independent result from `chronos.symbolic` instead
+    of a date, used by `Parser.parse_symbolic`.
+
+    `name` tells which extractor found a value, see `Match.kind`.
     """
+    name = None
+    rules = ()
+    token_rules = ()
+    symbol_rules = ()
+    triggers = ()
+
     def __init__(self, ref=None):
-        """Initialize with a reference datetime object.
+        """Initialize with a default reference datetime object.
 
-        All extractors will use this reference datetime for any relative dates.
-        The current datetime will be set to ref and any calculations be done.
+        The reference is only used by `extract` calls without a context of
+        their own; parsers always pass the context of the call.
         """
+        if self.name is None:
+            self.name = type(self).__name__
         self.ref = ref
 
-    def extract(self, text):
-        raise NotImplementedError
+    def extract(self, text, context=None):
+        """Run every rule over the text, one pattern after the other.
+
+        context is the `ReferenceDay` to resolve against, the one of the
+        reference given at construction by default.
+        """
+        if not self.rules:
+            raise NotImplementedError
+
+        if context is None:
+            context = reference_day(self.ref)
+        result = []
+        for pattern, handler in self.rules:
+            for match in pattern.findall(text):
+                value = handler(match, context)
+                if value is not None:
+                    result.append(value)
+
+        return result
+
 
+__all__ = ['Extractor']
@@ -3,76 +3,52 @@
 
 """Extract holidays like christmas, new year or other popularly known days."""
 
-import re
-import datetime
-
 from chronos.extractor.base import Extractor
+from chronos.holidays import calendar
+from chronos.symbolic import Holiday
 
 
-class ChristmasExtractor(Extractor):
-    """Extract Christmas or Christmas Eve from text."""
+class HolidayExtractor(Extractor):
+    """Extract every holiday of a calendar from text.
+
+    All the holidays are matched by the one pattern of the calendar, so
+    adding holidays to the table does not add scans of the text.
+    """
+
+    calendar = calendar
+    name = 'holiday'
 
     def __init__(self, ref=None):
-        super(ChristmasExtractor, self).__init__(ref)
-        # Have patterns for last/next christmas
-        self.pattern = re.compile(r"\b(christmas(\seve)*)\b", re.IGNORECASE)
-
-    def extract(self, text):
-        """Extract dates with christmas or christmas eve combinations."""
-        matches = self.pattern.findall(text)
-        if not matches:
-            return []
-
-        # Get current year
-        if self.ref:
-            cur_year = self.ref.year
+        super(HolidayExtractor, self).__init__(ref)
+        self.triggers = self.calendar.triggers
+        self.rules = [(self.calendar.pattern, self.extract_holiday)]
+        self.symbol_rules = [(self.calendar.pattern, self.symbol_holiday)]
+        # Symbols of holidays from the default calendar do not need to carry it
+        if set(self.calendar.holidays) <= set(calendar.holidays):
+            self.symbol_calendar = None
         else:
-            cur_year = datetime.datetime.today().year
-
-        result = []
-        for match in matches:
-            if len(match[0]) == 13: # christmas eve
-                date_obj = datetime.date(cur_year, 12, 24)
-            elif len(match[0]) == 9: # christmas
-                date_obj = datetime.date(cur_year, 12, 25)
+            self.symbol_calendar = self.calendar
 
-            result.append(date_obj)
+    def extract_holiday(self, match, context):
+        """Extract the date of the holiday matched in the reference year."""
+        return self.calendar.dates(context.year)[self.calendar.name(match)]
 
-        return result
+    def symbol_holiday(self, match, context):
+        return Holiday(self.calendar.name(match), self.symbol_calendar)
 
 
-class NewYearExtractor(Extractor):
-    """Extract New Year or New Year Eve from text."""
+class ChristmasExtractor(HolidayExtractor):
+    """Extract Christmas or Christmas Eve from text."""
 
-    def __init__(self, ref=None):
-        super(NewYearExtractor, self).__init__(ref)
-        # Have patterns for last/next christmas
-        self.pattern = re.compile(r"\b(new\s?year'?s?(\seve)*)\b",
-                                  re.IGNORECASE)
-
-    def extract(self, text):
-        """Extract dates with new year or new year eve combinations."""
-        matches = self.pattern.findall(text)
-        if not matches:
-            return []
-
-        # Get current year
-        if self.ref:
-            cur_year = self.ref.year
-        else:
-            cur_year = datetime.date.today().year
-        next_year = cur_year + 1
+    calendar = calendar.subset(['christmas', 'christmas eve'])
+    name = 'christmas'
 
-        result = []
-        for match in matches:
-            if match[-1]: # new years "eve"
-                date_obj = datetime.date(cur_year, 12, 31)
-            else: # just new years
-                date_obj = datetime.date(next_year, 1, 1)
 
-            result.append(date_obj)
+class NewYearExtractor(HolidayExtractor):
+    """Extract New Year or New Year Eve from text."""
 
-        return result
+    calendar = calendar.subset(['new year', 'new year eve'])
+    name = 'new_year'
 
 
-__all__ = ['ChristmasExtractor', 'NewYearExtractor']
+__all__ = ['HolidayExtractor', 'ChristmasExtractor', 'NewYearExtractor']
@@ -7,35 +7,173 @@ import re
 import datetime
 
 from chronos.extractor.base import Extractor
+from chronos.symbolic import Absolute
+
+
+# Offsets seen so far, shared so that equal offsets give the same tzinfo
+timezones = {0: datetime.timezone.utc}
+
+
+def get_timezone(minutes):
+    """Return a fixed offset tzinfo for an offset given in minutes."""
+    tz = timezones.get(minutes)
+    if tz is None:
+        tz = timezones[minutes] = datetime.timezone(datetime.timedelta(minutes=minutes))
+    return tz
+
+
+def week_date(year, week, weekday):
+    """Date of an ISO week date, raising ValueError if there is none."""
+    if not 1 <= week <= 53 or not 1 <= weekday <= 7:
+        raise ValueError("invalid week date")
+    # Week 1 is the one with January 4th in it
+    january4 = datetime.date(year, 1, 4)
+    date = january4 + datetime.timedelta(days=7 * (week - 1) + weekday - 1 - january4.weekday())
+    if week == 53 and date.isocalendar()[0] != year:
+        raise ValueError("%d has no week 53" % year)
+    return date
+
+
+def parse_iso8601(value):
+    """Build a datetime from a string located by `ISO8601Extractor.pattern`.
+
+    Fields are read straight from integer slices instead of going through
+    strptime. Handles calendar, week and ordinal dates in both extended and
+    basic format, a fraction on the last time component and Z or +/-hh:mm
+    offsets, which give an aware datetime. Returns None for out of range
+    values like a 13th month.
+    """
+    if (len(value) in (10, 13, 16, 19) and value[7:8] == '-' and
+            value[13:14] in ('', ':') and value[16:17] in ('', ':')):
+        # Fast path for YYYY-MM-DD[Thh[:mm[:ss]]], the usual log timestamp
+        try:
+            return datetime.datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                     int(value[11:13] or 0), int(value[14:16] or 0),
+                                     int(value[17:19] or 0))
+        except ValueError:
+            if value[11:13] != '24':
+                return None
+
+    if 'T' in value:
+        date_part, _, time_part = value.partition('T')
+    else:
+        date_part, _, time_part = value.partition('t')
+
+    # Dashes only separate the fields, drop them to get the basic format
+    date_part = date_part.replace('-', '')
+    year = int(date_part[:4])
+    try:
+        if date_part[4] == 'W':  # YYYYWww or YYYYWwwD
+            week = int(date_part[5:7])
+            weekday = int(date_part[7:8] or 1)
+            date = week_date(year, week, weekday)
+        elif len(date_part) == 7:  # YYYYDDD
+            day = int(date_part[4:7])
+            if not 1 <= day <= 366:
+                return None
+            date = datetime.date(year, 1, 1) + datetime.timedelta(days=day - 1)
+            if date.year != year:
+                return None
+        else:  # YYYYMMDD
+            date = datetime.date(year, int(date_part[4:6]), int(date_part[6:8]))
+    except (ValueError, OverflowError):
+        return None
+
+    if not time_part:
+        return datetime.datetime(date.year, date.month, date.day)
+
+    # Split off the offset, which always starts with Z, + or -
+    tzinfo = None
+    for i, char in enumerate(time_part):
+        if char in 'Z+-':
+            offset = time_part[i:]
+            time_part = time_part[:i]
+            if offset == 'Z':
+                tzinfo = datetime.timezone.utc
+            else:
+                offset = offset[1:].replace(':', '')
+                minutes = int(offset[:2]) * 60 + int(offset[2:4] or 0)
+                if minutes >= 24 * 60:
+                    return None
+                if char == '-':
+                    minutes = -minutes
+                tzinfo = get_timezone(minutes)
+            break
+
+    # A fraction belongs to whichever component comes last
+    fraction = 0
+    for i, char in enumerate(time_part):
+        if char in '.,':
+            # Digits past the 12th are below a microsecond of an hour
+            digits = time_part[i + 1:i + 13]
+            fraction = int(digits) / (10.0 ** len(digits))
+            time_part = time_part[:i]
+            break
+
+    time_part = time_part.replace(':', '')
+    hour = int(time_part[:2])
+    minute = int(time_part[2:4] or 0)
+    second = int(time_part[4:6] or 0)
+    if len(time_part) == 2:
+        micros = int(round(fraction * 3600000000))
+    elif len(time_part) == 4:
+        micros = int(round(fraction * 60000000))
+    else:
+        micros = int(round(fraction * 1000000))
+
+    if hour == 24 and minute == second == micros == 0:
+        # 24:00 is the end of the day, i.e. midnight of the next one
+        if date == datetime.date.max:
+            return None
+        date += datetime.timedelta(days=1)
+        hour = 0
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+
+    result = datetime.datetime(date.year, date.month, date.day,
+                               hour, minute, second, 0, tzinfo)
+    if micros:
+        result += datetime.timedelta(microseconds=micros)
+    return result
 
 
 class ISO8601Extractor(Extractor):
     """Extract date/time formatted in ISO 8601 standard."""
 
+    pattern = re.compile(r"""(?<!\d)(
+                               \d{4}(?:
+                                 # extended format, date and optional time
+                                 \-(?:\d\d\-\d\d|W\d\d(?:\-\d)?|\d{3})
+                                 (?:[tT]\d\d(?::\d\d(?::\d\d)?)?(?:[.,]\d+)?
+                                    (?:Z|[+\-]\d\d(?::?\d\d)?)?)?
+                               |
+                                 # basic format, needs a time unless a week date
+                                 (?:\d{4}|\d{3})
+                                 [tT]\d\d(?:\d\d(?:\d\d)?)?(?:[.,]\d+)?
+                                 (?:Z|[+\-]\d\d(?::?\d\d)?)?
+                               |
+                                 W\d\d\d?
+                                 (?:[tT]\d\d(?:\d\d(?:\d\d)?)?(?:[.,]\d+)?
+                                    (?:Z|[+\-]\d\d(?::?\d\d)?)?)?
+                               )
+                             )(?!\d)
+                          """, re.VERBOSE)
+    triggers = tuple('0123456789')
+    name = 'iso8601'
+
     def __init__(self, ref=None):
         super(ISO8601Extractor, self).__init__(ref)
-        # Using pattern from http://stackoverflow.com/a/8270148/1448
-        self.pattern = re.compile(r"""(
-                                        \d{4}\-\d\d\-\d\d  # date
-                                        ([tT][\d:\.]*)?    # optional time
-                                      )
-                                   """, re.VERBOSE)
-
-    def extract(self, text):
-        """Extract ISO formatted dates and time."""
-        result = []
-        matches = self.pattern.findall(text)
-
-        for match in matches:
-            # Use the right strptime format to parse it
-            if len(match[0]) == 10: # YYYY-MM-DD
-                fmt = "%Y-%m-%d"
-            elif len(match[0]) == 13: # YYYY-MM-DDThh
-                fmt = "%Y-%m-%dT%H"
-            elif len(match[0]) == 16: # YYYY-MM-DDThh:mm
-                fmt = "%Y-%m-%dT%H:%M"
-            elif len(match[0]) == 19: # YYYY-MM-DDThh:mm:ss
-                fmt = "%Y-%m-%dT%H:%M:%S"
-            result.append(datetime.datetime.strptime(match[0], fmt))
-
-        return result
\ No newline at end of file
+        self.rules = [(self.pattern, self.extract_iso)]
+        self.symbol_rules = [(self.pattern, self.symbol_iso)]
+
+    def extract_iso(self, match, context):
+        """Extract ISO formatted date and time from a single match."""
+        return parse_iso8601(match)
+
+    def symbol_iso(self, match, context):
+        value = parse_iso8601(match)
+        if value is not None:
+            return Absolute(value)
+
+
+__all__ = ['ISO8601Extractor', 'parse_iso8601']
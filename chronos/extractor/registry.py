@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Registry of the known extractors, imported only when first used."""
+
+import importlib
+from collections import OrderedDict
+
+
+# Name of every extractor and its class, or the 'module:Class' path to import
+# it from. Parsers use all of them, in this order, unless told otherwise.
+registry = OrderedDict([
+    ('holiday', 'chronos.extractor.holiday_extractor:HolidayExtractor'),
+    ('iso8601', 'chronos.extractor.iso_extractor:ISO8601Extractor'),
+    ('relative_day', 'chronos.extractor.relative_day_extractor:RelativeDayExtractor'),
+])
+
+
+def register(name, extractor):
+    """Add an extractor class, or a 'module:Class' path to import it lazily.
+
+    Registering an existing name replaces that extractor.
+    """
+    registry[name] = extractor
+
+
+def get_extractor(name):
+    """Return the extractor class registered under name, importing it if needed."""
+    try:
+        extractor = registry[name]
+    except KeyError:
+        raise ValueError("unknown extractor %r" % name)
+
+    if isinstance(extractor, str):
+        module, _, attr = extractor.partition(':')
+        extractor = getattr(importlib.import_module(module), attr)
+        registry[name] = extractor
+    return extractor
+
+
+def extractor_names():
+    """Return the names of all registered extractors, in order."""
+    return list(registry)
+
+
+__all__ = ['register', 'get_extractor', 'extractor_names']
@@ -7,133 +7,122 @@ import re
 import datetime
 
 from chronos.extractor.base import Extractor
+from chronos.reference import UNIT_DAYS
+from chronos.symbolic import RelativeOffset, Weekday
+
+
+DAY_OFFSETS = {'day before yesterday': RelativeOffset(-2, 'day'),
+               'yesterday': RelativeOffset(-1, 'day'),
+               'today': RelativeOffset(0, 'day'),
+               'tomorrow': RelativeOffset(1, 'day'),
+               'day after tomorrow': RelativeOffset(2, 'day'),
+               }
 
 
 class RelativeDayExtractor(Extractor):
+    # No pattern nests repeats, so a failed attempt gives up after a bounded
+    # number of steps and a scan is linear in the length of the text. The
+    # lookaheads on the first letter skip most positions right away.
+    day_pattern = re.compile(r"""\b(?=[dty])(day before yesterday|day after tomorrow|yesterday|tomorrow|today)\b""",
+                             re.IGNORECASE)
+    # Only with next/in or ago/back, so "a day" does not use up the text of
+    # "day after tomorrow"
+    relative_days_pattern = re.compile(r'\b(?=[nia\d])(?:(next|in) ?|(?=(?:\d+|a) (?:year|month|week|day)s? ?(?:ago|back)\b))(\d+|a) (year|month|week|day)s?(?: ?(ago|back))?\b',
+                                       re.IGNORECASE)
+    last_next_pattern = re.compile(r'\b(?=[ln])(last|next) (year|month|week)\b',
+                                   re.IGNORECASE)
+    last_next_day_pattern = re.compile(r'\b(?=[ln])(last|next) (monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b',
+                                       re.IGNORECASE)
+    # Every weekday name as well as today and yesterday contain "day"
+    triggers = ('day', 'week', 'month', 'year', 'tomorrow')
+    name = 'relative_day'
+
     def __init__(self, ref=None):
         super(RelativeDayExtractor, self).__init__(ref)
-        self.patterns = {re.compile(r"""\b(day before yesterday|day after tomorrow|yesterday|tomorrow|today)\b""",
-                                    re.IGNORECASE): self.__extract_day,
-                         re.compile(r'\b(next|in)* ?(\d+|a) (year|month|week|day)s? ?(ago|back)*\b',
-                                    re.IGNORECASE): self.__extract_relative_days,
-                         re.compile(r'\b(last|next) (year|month|week)\b',
-                                    re.IGNORECASE): self.__extract_last_next,
-                         re.compile(r'\b(last|next) (monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b',
-                                    re.IGNORECASE): self.__extract_last_next_day,
-                         }
-
-        if ref:
-            self.today = ref.date()
+        self.rules = [(self.day_pattern, self.__extract_day),
+                      (self.relative_days_pattern, self.__extract_relative_days),
+                      (self.last_next_pattern, self.__extract_last_next),
+                      (self.last_next_day_pattern, self.__extract_last_next_day),
+                      ]
+        self.token_rules = [('yesterday|tomorrow|today', self.__extract_day),
+                            ('day before yesterday', self.__extract_day_phrase),
+                            ('day after tomorrow', self.__extract_day_phrase),
+                            ('next|in ~#|a year|years|month|months|week|weeks|day|days ~ago|back?',
+                             self.__extract_relative_days),
+                            ('#|a year|years|month|months|week|weeks|day|days ~ago|back',
+                             self.__extract_relative_ago),
+                            ('last|next year|month|week', self.__extract_last_next),
+                            ('last|next monday|tuesday|wednesday|thursday|friday|saturday|sunday',
+                             self.__extract_last_next_day),
+                            ]
+        self.symbol_rules = [(self.day_pattern, self.__symbol_day),
+                             (self.relative_days_pattern, self.__symbol_relative_days),
+                             (self.last_next_pattern, self.__symbol_last_next),
+                             (self.last_next_day_pattern, self.__symbol_last_next_day),
+                             ]
+
+    def __extract_day(self, match, context):
+        """Extract today, tomorrow, yesterday, etc."""
+        return context.days.get(match.lower())
+
+    def __extract_day_phrase(self, match, context):
+        """Extract day before yesterday, etc. from their words."""
+        return context.days.get(' '.join(match))
+
+    def __relative_days(self, match):
+        """Return (signed amount, unit) of "in N days", "N days ago", etc."""
+        direction, amount, unit, ago = [m.lower() for m in match]
+        # Words from tokens keep the plural
+        unit = unit.rstrip('s')
+        if amount == 'a':
+            # For "in a week", "a week back", "a week ago", etc.
+            if direction == 'next':
+                # "next a week" doesn't make sense
+                return None
+            else:
+                num = 1
         else:
-            self.today = datetime.date.today()
+            # in N days, N weeks back, N years ago, etc.
+            num = int(amount)
 
-    def extract(self, text):
-        """Extract all types of relative patterns."""
-        result = []
-        for pattern, functor in self.patterns.items():
-            matches = pattern.findall(text)
-            result.extend(functor(matches))
+        if direction and ago:  # both in and ago doesn't make sense
+            return None
 
-        return result
+        if direction:  # either of next or in
+            return num, unit
+        elif ago:  # either ago or back
+            return -num, unit
 
-    def __extract_day(self, matches):
-        """Extract today, tomorrow, yesterday, etc."""
-        result = []
-        one_day = datetime.timedelta(days=1)
-        yesterday = self.today - one_day
-        tomorrow = self.today + one_day
-        db_yesterday = yesterday - one_day
-        da_tomorrow = tomorrow + one_day
-
-        for match in matches:
-            match_lower = match.lower()
-            if match_lower == 'yesterday':
-                result.append(yesterday)
-            elif match_lower == 'tomorrow':
-                result.append(tomorrow)
-            elif match_lower == 'today':
-                result.append(self.today)
-            elif match_lower == 'day before yesterday':
-                result.append(db_yesterday)
-            elif match_lower == 'day after tomorrow':
-                result.append(da_tomorrow)
-
-        return result
-
-    def __extract_relative_days(self, matches):
+    def __extract_relative_days(self, match, context):
         """Extract phrases like "in N days", "N days ago", etc."""
-        result = []
-        for match in matches:
-            if match[1] == 'a':
-                # For "in a week", "a week back", "a week ago", etc.
-                if match[0] == 'next':
-                    # "next a week" doesn't make sense
-                    continue
-                else:
-                    num = 1
-            else:
-                # in N days, N weeks back, N years ago, etc.
-                num = int(match[1])
-
-            if match[2] == 'day':
-                delta = datetime.timedelta(days=num)
-            elif match[2] == 'week':
-                delta = datetime.timedelta(weeks=num)
-            elif match[2] == 'month':
-                # assuming 30 days to a month
-                delta = datetime.timedelta(days=num*30)
-            elif match[2] == 'year':
-                # assuming 365 days to a year
-                delta = datetime.timedelta(days=num*365)
-
-            if match[0] and match[3]:  # both in and ago doesn't make sense
-                continue
-
-            if match[0]:  # either of next or in
-                result.append(self.today + delta)
-            elif match[3]:  # either ago or back
-                result.append(self.today - delta)
-
-        return result
-
-    def __extract_last_next(self, matches):
+        offset = self.__relative_days(match)
+        if offset is not None:
+            num, unit = offset
+            return context.today + datetime.timedelta(days=num * UNIT_DAYS[unit])
+
+    def __extract_relative_ago(self, match, context):
+        """Extract phrases like "N days ago" matched without next/in."""
+        return self.__extract_relative_days(('',) + tuple(match), context)
+
+    def __extract_last_next(self, match, context):
         """Extract from matches like last/next week/month/year combinations."""
-        result = []
-        for match in matches:
-            if match[1] == 'week':
-                delta = datetime.timedelta(weeks=1)
-            elif match[1] == 'month':
-                delta = datetime.timedelta(days=30)
-            elif match[1] == 'year':
-                delta = datetime.timedelta(days=365)
-
-            if match[0] == 'last':
-                result.append(self.today - delta)
-            elif match[0] == 'next':
-                result.append(self.today + delta)
-        return result
-
-    def __extract_last_next_day(self, matches):
+        return context.last_next.get((match[0].lower(), match[1].lower()))
+
+    def __extract_last_next_day(self, match, context):
         """Extract matches with last wednesday, next friday, etc."""
-        result = []
-        today_num = self.today.weekday()
-        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        day_num = dict([(day, i) for i, day in enumerate(days)])
-        for match in matches:
-            match_num = day_num[match[1].lower()]
-            if match[0] == 'last':
-                if today_num >= match_num:
-                    if today_num - match_num == 0: # matched day is also today
-                        delta = datetime.timedelta(days=7)
-                    else:
-                        delta = datetime.timedelta(days=today_num - match_num)
-                else:
-                    delta = datetime.timedelta(days=7-today_num)
-                result.append(self.today - delta)
-            elif match[0] == 'next':
-                if today_num >= match_num:
-                    delta = datetime.timedelta(days=7 + match_num - today_num)
-                else:
-                    delta = datetime.timedelta(match_num - today_num)
-                result.append(self.today + delta)
-        return result
+        return context.weekdays.get((match[0].lower(), match[1].lower()))
+
+    def __symbol_day(self, match, context):
+        return DAY_OFFSETS.get(match.lower())
+
+    def __symbol_relative_days(self, match, context):
+        offset = self.__relative_days(match)
+        if offset is not None:
+            return RelativeOffset(*offset)
+
+    def __symbol_last_next(self, match, context):
+        direction, unit = match[0].lower(), match[1].lower()
+        return RelativeOffset(1 if direction == 'next' else -1, unit)
+
+    def __symbol_last_next_day(self, match, context):
+        return Weekday(match[0].lower(), match[1].lower())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Table driven holiday calendar.
+
+Every holiday is a row of (name, pattern, rule). The pattern matches the
+ways of writing its name, the rule computes its date for a given year.
+All the patterns of a calendar are compiled into a single regex, so a text
+is scanned once however many holidays there are, and the dates of a year
+are computed once and remembered.
+"""
+
+import re
+import datetime
+import itertools
+
+
+MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = range(7)
+
+
+def fixed(month, day, year_offset=0):
+    """Rule for a holiday on the same day every year.
+
+    year_offset moves it to the next year, as "new year" means the coming one.
+    """
+    def rule(year):
+        return datetime.date(year + year_offset, month, day)
+    return rule
+
+
+def nth_weekday(month, weekday, n):
+    """Rule for the nth weekday of a month, counting from the end if n < 0."""
+    def rule(year):
+        if n > 0:
+            first = datetime.date(year, month, 1)
+            return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+        if month == 12:
+            last = datetime.date(year, 12, 31)
+        else:
+            last = datetime.date(year, month + 1, 1) - datetime.timedelta(days=1)
+        return last - datetime.timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+    return rule
+
+
+def easter_sunday(year):
+    """Date of (western) Easter Sunday, by the anonymous Gregorian algorithm."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def easter(offset=0):
+    """Rule for a holiday a number of days from Easter Sunday."""
+    def rule(year):
+        return easter_sunday(year) + datetime.timedelta(days=offset)
+    return rule
+
+
+HOLIDAYS = [
+    ('christmas', r"christmas", fixed(12, 25)),
+    ('christmas eve', r"christmas\seve", fixed(12, 24)),
+    ('new year', r"new\s?year'?s?", fixed(1, 1, 1)),
+    ('new year eve', r"new\s?year'?s?\seve", fixed(12, 31)),
+    ('boxing day', r"boxing\sday", fixed(12, 26)),
+    ('valentines day', r"valentine'?s?\sday", fixed(2, 14)),
+    ('st patricks day', r"st\.?\s?patrick'?s?\sday", fixed(3, 17)),
+    ('independence day', r"independence\sday", fixed(7, 4)),
+    ('halloween', r"hallowe'?en", fixed(10, 31)),
+    ('veterans day', r"veteran'?s'?\sday", fixed(11, 11)),
+    ('martin luther king day', r"martin\sluther\sking(?:\sjr\.?)?\sday", nth_weekday(1, MONDAY, 3)),
+    ('presidents day', r"president'?s'?\sday", nth_weekday(2, MONDAY, 3)),
+    ('mothers day', r"mother'?s'?\sday", nth_weekday(5, SUNDAY, 2)),
+    ('memorial day', r"memorial\sday", nth_weekday(5, MONDAY, -1)),
+    ('fathers day', r"father'?s'?\sday", nth_weekday(6, SUNDAY, 3)),
+    ('labor day', r"labou?r\sday", nth_weekday(9, MONDAY, 1)),
+    ('columbus day', r"columbus\sday", nth_weekday(10, MONDAY, 2)),
+    ('thanksgiving', r"thanksgiving(?:\sday)?", nth_weekday(11, THURSDAY, 4)),
+    ('ash wednesday', r"ash\swednesday", easter(-46)),
+    ('good friday', r"good\sfriday", easter(-2)),
+    ('easter', r"easter(?:\ssunday)?", easter()),
+    ('easter monday', r"easter\smonday", easter(1)),
+    ('pentecost', r"pentecost", easter(49)),
+]
+
+
+def literal_prefix(pattern):
+    """Lowercase letters every match of the pattern starts with."""
+    prefix = re.match(r"[a-z]*", pattern).group()
+    if pattern[len(prefix):len(prefix) + 1] in ('?', '*', '{'):
+        # the last letter is optional
+        prefix = prefix[:-1]
+    return prefix
+
+
+def longest_literal(pattern):
+    """Longest run of lowercase letters found in every match of the pattern.
+
+    Groups, which may be optional, and letters made optional by a
+    quantifier are left out.
+    """
+    runs = []
+    run = ''
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            # an escaped character or class like \s ends the run
+            char = None
+            i += 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0 and 'a' <= char <= 'z':
+            if pattern[i + 1:i + 2] in ('?', '*', '{'):
+                runs.append(run)
+                run = ''
+            else:
+                run += char
+            i += 1
+            continue
+        runs.append(run)
+        run = ''
+        i += 1
+    runs.append(run)
+    return max(runs, key=len)
+
+
+class HolidayCalendar(object):
+    """A set of holidays matched by one regex, with dates memoized per year."""
+
+    def __init__(self, holidays=HOLIDAYS):
+        for name, pattern, rule in holidays:
+            if not literal_prefix(pattern):
+                raise ValueError("pattern of %r must start with a letter" % name)
+        # Grouped by first letter, longer names first so "christmas eve" wins
+        # over "christmas"
+        self.holidays = sorted(holidays, key=lambda holiday: (holiday[1][0], -len(holiday[0])))
+        self.names = [name for name, pattern, rule in self.holidays]
+        # The longest word of a holiday is the one least likely to be found
+        # in text without it, "patrick" rather than "st"
+        self.triggers = tuple(sorted(set(longest_literal(pattern)
+                                         for name, pattern, rule in self.holidays)))
+        self._pattern = None
+        self.years = {}
+
+    @property
+    def pattern(self):
+        """Compiled regex with one group per holiday, built on first use.
+
+        The regex engine tries every alternative at every word, so they are
+        branched on their first letter to skip most of them at once.
+        """
+        if self._pattern is None:
+            branches = []
+            for letter, holidays in itertools.groupby(self.holidays, lambda holiday: holiday[1][0]):
+                branches.append('(?=%s)(?:%s)' % (letter, '|'.join(
+                    '(%s)' % pattern for name, pattern, rule in holidays)))
+            letters = ''.join(sorted(set(holiday[1][0] for holiday in self.holidays)))
+            self._pattern = re.compile(r"\b(?=[%s])(?:%s)\b" % (letters, '|'.join(branches)),
+                                       re.IGNORECASE)
+        return self._pattern
+
+    def name(self, match):
+        """Name of the holiday from a `findall` tuple of the pattern."""
+        if isinstance(match, str):
+            return self.names[0]
+        # Only the group of the holiday which matched is not empty
+        return self.names[match.index(max(match))]
+
+    def dates(self, year):
+        """Return a dict of the date of every holiday in the year."""
+        dates = self.years.get(year)
+        if dates is None:
+            if len(self.years) >= 256:
+                self.years.clear()
+            dates = dict((name, rule(year)) for name, pattern, rule in self.holidays)
+            self.years[year] = dates
+        return dates
+
+    def subset(self, names):
+        """Return a new calendar with only the named holidays."""
+        return HolidayCalendar([holiday for holiday in self.holidays
+                                if holiday[0] in names])
+
+
+calendar = HolidayCalendar()
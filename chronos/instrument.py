@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Opt-in timings and counters for parsers, extractors and their rules."""
+
+import time
+import threading
+
+
+# Latency histogram buckets are powers of two of microseconds, the last one
+# holds everything slower than about 8 seconds
+HISTOGRAM_BUCKETS = 24
+
+
+class Stats(object):
+    """Counters for one instrumented step."""
+    __slots__ = ('calls', 'matches', 'seconds', 'input_size', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.matches = 0
+        self.seconds = 0.0
+        self.input_size = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def as_dict(self):
+        return {'calls': self.calls,
+                'matches': self.matches,
+                'seconds': self.seconds,
+                'input_size': self.input_size,
+                'histogram': list(self.histogram),
+                }
+
+
+class Instrumentation(object):
+    """Collects call counts, match counts, latency and input sizes.
+
+    Give an instance to `Parser` to turn it on; a parser without one does no
+    bookkeeping at all. Steps are recorded under these keys:
+
+    * ``parse``: every text a parser scanned
+    * ``skipped``: texts in which no extractor had a trigger word
+    * ``budget_exceeded``: texts a parser gave up on when its time budget
+      ran out
+    * ``<extractor name>``: scans the extractor took part in, with the input
+      size, and the matches and time of its handlers
+    * ``<extractor name>.<handler>``: calls of one rule handler
+
+    Every record is also passed to the sinks, callables taking
+    ``(key, seconds, matches, input_size, calls)``, to feed a metrics
+    system. seconds is None for records which only count something, and
+    calls is 0 for those which only add the time and matches of a handler
+    to its extractor.
+    """
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def add_sink(self, sink):
+        """Call sink(key, seconds, matches, input_size, calls) for every record."""
+        self.sinks.append(sink)
+
+    def record(self, key, seconds=None, matches=0, input_size=0, calls=1):
+        """Add one measurement of a step.
+
+        The latency histogram only counts records with both calls and
+        seconds, others just add to the totals.
+        """
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = Stats()
+            stats.calls += calls
+            stats.matches += matches
+            stats.input_size += input_size
+            if seconds is not None:
+                stats.seconds += seconds
+                if calls:
+                    bucket = min(int(seconds * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+                    stats.histogram[bucket] += 1
+        for sink in self.sinks:
+            sink(key, seconds, matches, input_size, calls)
+
+    def wrap(self, kind, handler):
+        """Return handler timed under its own key and its extractor's."""
+        key = '%s.%s' % (kind, handler.__name__.strip('_'))
+        record = self.record
+        timer = time.perf_counter
+
+        def timed(match, context):
+            start = timer()
+            value = handler(match, context)
+            elapsed = timer() - start
+            found = value is not None
+            record(key, elapsed, found)
+            record(kind, elapsed, found, calls=0)
+            return value
+
+        return timed
+
+    def snapshot(self):
+        """Return a dict of plain dicts with the counters of every step."""
+        with self.lock:
+            return dict((key, stats.as_dict()) for key, stats in self.stats.items())
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self.lock:
+            self.stats.clear()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Scan text with the patterns of many extractors, once per extractor."""
+
+import re
+import heapq
+
+
+class Match(object):
+    """A date or time found in a text, with where it was found.
+
+    `start` and `end` are offsets into the text, `text` is the matched
+    substring, `kind` the name of the extractor which found it and `value`
+    the resolved date or datetime. Uses slots to stay small, as batch jobs
+    keep millions of these around.
+    """
+    __slots__ = ('start', 'end', 'text', 'kind', 'value')
+
+    def __init__(self, start, end, text, kind, value):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.kind = kind
+        self.value = value
+
+    def __eq__(self, other):
+        if not isinstance(other, Match):
+            return NotImplemented
+        return (self.start, self.end, self.text, self.kind, self.value) == \
+               (other.start, other.end, other.text, other.kind, other.value)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Match(%r, %r, %r, %r, %r)' % (self.start, self.end, self.text,
+                                              self.kind, self.value)
+
+
+# Pattern flags which can be scoped to a group with (?flags:...)
+SCOPED_FLAGS = [(re.ASCII, 'a'),
+                (re.IGNORECASE, 'i'),
+                (re.MULTILINE, 'm'),
+                (re.DOTALL, 's'),
+                (re.VERBOSE, 'x'),
+                ]
+
+# Escapes, skipped over unless they are numbered backreferences, and
+# references to groups by name or in conditionals
+GROUP_REFERENCE = re.compile(r'\\(?:([1-9])|.)|(\(\?P=|\(\?\()', re.DOTALL)
+
+
+def scoped(pattern):
+    """Return the source of a compiled pattern with its flags inlined.
+
+    Patterns referring to their own groups are refused with a ValueError,
+    as the groups are numbered differently once merged with other patterns.
+    """
+    if pattern.groupindex:
+        raise ValueError("named groups are not supported in rules: %r" % pattern.pattern)
+    for reference in GROUP_REFERENCE.finditer(pattern.pattern):
+        if reference.group(1) or reference.group(2):
+            raise ValueError("backreferences are not supported in rules: %r"
+                             % pattern.pattern)
+    letters = ''.join(letter for flag, letter in SCOPED_FLAGS
+                      if pattern.flags & flag)
+    if pattern.flags & re.VERBOSE:
+        # A comment on the last line would swallow the closing parenthesis
+        return '(?%s:%s\n)' % (letters, pattern.pattern)
+    if letters:
+        return '(?%s:%s)' % (letters, pattern.pattern)
+    return '(?:%s)' % pattern.pattern
+
+
+def hit_start(hit):
+    """Position of a hit of `Matcher.finditer`, to merge them in text order."""
+    return hit[0].start()
+
+
+class Matcher(object):
+    """Combined matcher over the rules of a list of extractors.
+
+    The rule patterns of every extractor are wrapped in groups and merged
+    into one alternation, so each extractor scans the text once; when two of
+    its rules match at the same position the first one wins. The hits of the
+    extractors are merged in text order, those of the first extractor first
+    on a tie. Separate scans are faster than a single alternation over all
+    rules, which `re` could not skip through the text as quickly, and hits
+    of different extractors may overlap as when each runs its own extract.
+    """
+
+    def __init__(self, extractors, wrap=None, symbolic=False):
+        """Merge the rules of the extractors.
+
+        wrap, if given, is called as wrap(extractor name, handler) and
+        returns the handler to use instead, e.g. to time it. With symbolic,
+        the `symbol_rules` of the extractors are used instead.
+        """
+        self.kinds = []
+        # (extractor name, pattern, handlers by the index of their group)
+        self.scans = []
+        for extractor in extractors:
+            self.kinds.append(extractor.name)
+            rules = extractor.symbol_rules if symbolic else extractor.rules
+            parts = []
+            dispatch = {}
+            index = 1
+            for pattern, handler in rules:
+                if wrap is not None:
+                    handler = wrap(extractor.name, handler)
+                parts.append('(%s)' % scoped(pattern))
+                dispatch[index] = (extractor.name, handler, index, pattern.groups)
+                index += 1 + pattern.groups
+            if parts:
+                self.scans.append((extractor.name, re.compile('|'.join(parts)), dispatch))
+
+    def finditer(self, text, pos=0, starts=None):
+        """Yield (match object, kind, handler, match) for every hit in the text.
+
+        The last item is shaped like an item returned by `findall` of the
+        rule's own pattern, so it can be passed straight to the handler.
+        Scanning starts at pos, the text before it is still looked at by
+        word boundaries and lookbehinds. starts may map extractor names to
+        a later position to start their own scan at.
+        """
+        scans = [self.scan(text, pos if starts is None else max(pos, starts.get(kind, pos)),
+                           pattern, dispatch)
+                 for kind, pattern, dispatch in self.scans]
+        if len(scans) == 1:
+            return scans[0]
+        return heapq.merge(*scans, key=hit_start)
+
+    @staticmethod
+    def scan(text, pos, pattern, dispatch):
+        for m in pattern.finditer(text, pos):
+            # The wrapping group of a rule is always the last one to close
+            kind, handler, index, groups = dispatch[m.lastindex]
+            if groups == 0:
+                match = m.group(index)
+            elif groups == 1:
+                match = m.group(index + 1) or ''
+            else:
+                match = tuple(g or '' for g in m.group(*range(index + 1, index + 1 + groups)))
+            yield m, kind, handler, match
+
+    def extract(self, text, context=None):
+        """Return the list of values extracted from the text, in text order.
+
+        context is the `ReferenceDay` passed on to the handlers.
+        """
+        result = []
+        for m, kind, handler, match in self.finditer(text):
+            value = handler(match, context)
+            if value is not None:
+                result.append(value)
+        return result
+
+    def matches(self, text, context=None, pos=0, offset=0):
+        """Return the list of `Match` found in the text, in text order.
+
+        offset is added to the positions, for text which is a slice of a
+        larger one.
+        """
+        result = []
+        for m, kind, handler, match in self.finditer(text, pos):
+            value = handler(match, context)
+            if value is not None:
+                start, end = m.span()
+                result.append(Match(start + offset, end + offset, m.group(), kind, value))
+        return result
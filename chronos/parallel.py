@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Parse large in-memory corpora on all cores with a process pool."""
+
+import datetime
+import itertools
+import collections
+import multiprocessing
+from array import array
+
+from .parser import Parser
+
+
+# Parser of the current worker process, built once by the pool initializer
+_parser = None
+
+
+def _init_worker(extractors):
+    global _parser
+    _parser = Parser(extractors).warmup()
+
+
+def _parse_chunk(args):
+    texts, ref = args
+    return pack(_parser.parse_many(texts, ref))
+
+
+def pack(results):
+    """Flatten a list of results into a compact (counts, values, dates) triple.
+
+    Counts holds the number of values of every result and plain dates are
+    replaced by their ordinal, which pickles much smaller than date objects.
+    Dates holds the positions in values of those ordinals, so values of any
+    other type, ints among them, come back unchanged.
+    """
+    counts = array('I', [len(result) for result in results])
+    values = [value for result in results for value in result]
+    dates = array('I')
+    for pos, value in enumerate(values):
+        if type(value) is datetime.date:
+            values[pos] = value.toordinal()
+            dates.append(pos)
+    return counts, values, dates
+
+
+def unpack(counts, values, dates):
+    """Inverse of `pack`, yield the results one by one."""
+    fromordinal = datetime.date.fromordinal
+    for pos in dates:
+        values[pos] = fromordinal(values[pos])
+    pos = 0
+    for count in counts:
+        yield values[pos:pos + count]
+        pos += count
+
+
+def chunks(texts, chunksize):
+    """Split an iterable into lists of at most chunksize items."""
+    texts = iter(texts)
+    while True:
+        chunk = list(itertools.islice(texts, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_parallel(texts, ref=None, workers=None, chunksize=1000,
+                   extractors=None):
+    """Parse an iterable of strings with a pool of worker processes.
+
+    Every worker builds its own `Parser` once and reuses it for all the chunks
+    it is given. Results are yielded in input order. When ref is None the
+    current datetime is resolved once here, so all workers agree on "today".
+
+    Only a couple of chunks per worker are in flight at any time, so texts
+    can be a lazy iterable over a huge input without being read up front.
+    """
+    if ref is None:
+        ref = datetime.datetime.now()
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    pending = collections.deque()
+    tasks = chunks(texts, chunksize)
+    pool = multiprocessing.Pool(workers, _init_worker, (extractors,))
+    try:
+        for chunk in itertools.islice(tasks, 2 * workers):
+            pending.append(pool.apply_async(_parse_chunk, ((chunk, ref),)))
+        while pending:
+            counts, values, dates = pending.popleft().get()
+            for chunk in itertools.islice(tasks, 1):
+                pending.append(pool.apply_async(_parse_chunk, ((chunk, ref),)))
+            for result in unpack(counts, values, dates):
+                yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
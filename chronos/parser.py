@@ -0,0 +1,635 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Long-lived parser that builds its extractors only once."""
+
+import time
+import codecs
+import inspect
+import itertools
+import threading
+
+from .extractor import get_extractor, extractor_names
+from .matcher import Matcher, Match
+from .tokens import TokenMatcher
+from .cache import LRUCache
+from .columnar import Columns
+from .reference import reference_day
+from .symbolic import resolve
+
+
+# Text scanned under a budget is cut into windows of this many characters,
+# with the deadline checked between them
+BUDGET_WINDOW = 65536
+
+# Characters past the end of a window still looked at by its last matches
+BUDGET_OVERLAP = 256
+
+
+class ParseResult(list):
+    """List of the values of a `Parser.parse` with a time budget.
+
+    `incomplete` is True when the budget ran out before the whole text was
+    parsed, in which case the list holds the values found until then.
+    """
+
+    incomplete = False
+
+
+class Parser(object):
+    """Reusable date parser.
+
+    Extractors are built once, on first use or by `warmup`, and the
+    reference datetime is given per call, so one parser can be shared by
+    the whole process and its threads. Extractors which only implement
+    `extract` report no positions and cannot run on part of a text, so
+    everything returning `Match` objects or scanning by windows leaves them
+    out.
+    """
+
+    def __init__(self, extractors=None, cache_size=0, instrument=None, tokenize=False,
+                 max_length=None, budget_ms=None):
+        """Initialize with the extractors to use.
+
+        Extractors are given as registered names or classes and default to
+        every registered extractor; only the modules of those in use are
+        imported. Results are cached if a cache_size is given, see
+        `set_cache_size`, and timings recorded into an `Instrumentation` if
+        one is given. With tokenize, extractors with `token_rules` match
+        their phrases over tokens, see `TokenMatcher`, which pays off on
+        long documents. Texts longer than max_length are refused with a
+        ValueError, and budget_ms is the default time budget of `parse`.
+        """
+        self.extractor_classes = extractors
+        self.cache = None
+        self.set_cache_size(cache_size)
+        self.instrument = instrument
+        self.tokenize = tokenize
+        self.max_length = max_length
+        self.budget_ms = budget_ms
+        self.extractors = None
+        self.ruled = None
+        self.matchers = None
+        self.symbolic_matchers = None
+        self.lazy_matchers = None
+        self.fallback = None
+        self.lock = threading.Lock()
+
+    def warmup(self):
+        """Build all the extractors now instead of on the first parse."""
+        with self.lock:
+            if self.extractors is None:
+                self._build()
+        return self
+
+    def _build(self):
+        classes = self.extractor_classes
+        if classes is None:
+            classes = extractor_names()
+        extractors = [get_extractor(e)() if isinstance(e, str) else e()
+                      for e in classes]
+        self.ruled = [e for e in extractors if e.rules]
+        everything = tuple(range(len(self.ruled)))
+        self.matchers = {everything: self.build_matcher(everything)}
+        self.symbolic_matchers = {}
+        self.lazy_matchers = {}
+        self.fallback = [(e.name, self._fallback_extract(e)) for e in extractors if not e.rules]
+        # Set last, other threads only look at the rest once it is set
+        self.extractors = extractors
+
+    def _fallback_extract(self, extractor):
+        """Return extract(text, ref, context) running an extractor without rules.
+
+        The `ReferenceDay` is passed to extract methods with a context
+        parameter. Others, like extract(self, text), read their reference
+        from the instance, so a fresh one is built for every call instead of
+        changing the shared one.
+        """
+        extract = extractor.extract
+        try:
+            parameters = inspect.signature(extract).parameters
+        except (TypeError, ValueError):
+            parameters = {}
+        if 'context' in parameters:
+            return lambda text, ref, context: extract(text, context=context)
+        cls = type(extractor)
+        return lambda text, ref, context: cls(ref).extract(text)
+
+    def parse(self, text, ref=None, max_results=None, budget_ms=None, deadline=None):
+        """Parse a string and return list of extracted dates & times.
+
+        With max_results, scanning stops as soon as that many are found.
+
+        budget_ms bounds the time spent in this call, the parser's own
+        budget_ms by default, and deadline is a `time.monotonic` value not
+        to parse past. With either, time is checked before every handler
+        and extractor and between windows of long texts, and a `ParseResult`
+        is returned. Exceeded budgets are counted as ``budget_exceeded`` by
+        an `Instrumentation`.
+        """
+        if budget_ms is None:
+            budget_ms = self.budget_ms
+        if budget_ms is not None:
+            end = time.monotonic() + budget_ms / 1000.0
+            if deadline is None or end < deadline:
+                deadline = end
+        result = [] if deadline is None else ParseResult()
+
+        if not text:
+            return result
+        matcher = self._prepare(text, lazy=max_results is not None)
+        if matcher is False or max_results == 0:
+            return result
+
+        context = reference_day(ref)
+        # Read once, set_cache_size may swap it from another thread
+        cache = self.cache
+        if cache is not None:
+            key = (text, context.today)
+            cached = cache.get(key)
+            if cached is not None:
+                result.extend(cached[:max_results])
+                return result
+
+        # Partial results are not cached
+        if deadline is not None:
+            self._parse_budget(text, matcher, ref, context, deadline, max_results, result)
+            if result.incomplete or max_results is not None:
+                return result
+        elif max_results is not None:
+            result.extend(itertools.islice(self._iter(text, matcher, ref, context), max_results))
+            return result
+        else:
+            result = self._extract(text, matcher, ref, context)
+
+        if cache is not None:
+            cache.put(key, tuple(result))
+        return result
+
+    def _prepare(self, text, lazy=False):
+        """Return the matcher to parse a non empty text with.
+
+        The text is checked against max_length first. Returns False if
+        there is nothing to parse in it. With lazy, the matcher is one for
+        scans which may stop early, see `matcher`.
+        """
+        self.check_length(text)
+
+        if self.extractors is None:
+            self.warmup()
+
+        # Text which no extractor can match does not even need the ref
+        matcher = self.matcher(text, lazy=lazy)
+        if matcher is None and not self.fallback:
+            if self.instrument is not None:
+                self.instrument.record('skipped', input_size=len(text))
+            return False
+        return matcher
+
+    def _parse_budget(self, text, matcher, ref, context, deadline, max_results, result):
+        if self.instrument is None or matcher is None:
+            if self.instrument is not None:
+                self.instrument.record('skipped', input_size=len(text))
+            self._scan_budget(text, matcher, ref, context, deadline, max_results, result)
+        else:
+            scan = lambda text, context: self._scan_budget(text, matcher, ref, context,
+                                                           deadline, max_results, result)
+            self._instrumented(text, matcher, scan, context)
+        if result.incomplete and self.instrument is not None:
+            self.instrument.record('budget_exceeded', input_size=len(text))
+        return result
+
+    def _scan_budget(self, text, matcher, ref, context, deadline, max_results, result):
+        """Append the values of text to result until the deadline passes.
+
+        The text is scanned window by window with `scan_chunks`, so the
+        deadline is also checked in long texts without any match.
+        """
+        timer = time.monotonic
+        if max_results is None:
+            max_results = -1
+        if matcher is not None:
+            chunks = (text[i:i + BUDGET_WINDOW] for i in range(0, len(text), BUDGET_WINDOW))
+            for hit in self.scan_chunks(chunks, BUDGET_OVERLAP, matcher=matcher):
+                if timer() > deadline:
+                    result.incomplete = True
+                    return result
+                if hit is None:
+                    continue
+                start, end, m, kind, handler, match = hit
+                value = handler(match, context)
+                if value is not None:
+                    result.append(value)
+                    if len(result) == max_results:
+                        return result
+
+        for name, extract in self.fallback:
+            if timer() > deadline:
+                result.incomplete = True
+                return result
+            out = extract(text, ref, context)
+            if out:
+                result.extend(out)
+                if max_results >= 0 and len(result) >= max_results:
+                    del result[max_results:]
+                    return result
+        return result
+
+    def parse_iter(self, text, ref=None, spans=False):
+        """Yield the dates & times of a string lazily, in text order.
+
+        Nothing is scanned past the last value taken, so stopping early
+        costs little more than the text up to there. With spans, a `Match`
+        is yielded instead of the bare value.
+        """
+        if not text:
+            return
+        matcher = self._prepare(text, lazy=True)
+        if matcher is False:
+            return
+
+        for value in self._iter(text, matcher, ref, reference_day(ref), spans):
+            yield value
+
+    def parse_first(self, text, ref=None):
+        """Return the first date or time of a string, None if there is none."""
+        for value in self.parse_iter(text, ref):
+            return value
+        return None
+
+    def parse_matches(self, text, ref=None):
+        """Parse a string and return a list of `Match`, sorted by position.
+
+        Each match carries its offsets, the matched text and the name of the
+        extractor along with the value.
+        """
+        if not text:
+            return []
+        self.check_length(text)
+
+        if self.extractors is None:
+            self.warmup()
+
+        matcher = self.matcher(text)
+        if matcher is None:
+            return []
+
+        context = reference_day(ref)
+        if self.instrument is not None:
+            return self._instrumented(text, matcher, matcher.matches, context)
+        return matcher.matches(text, context)
+
+    def parse_symbolic(self, text):
+        """Parse a string into reference independent symbols, see `resolve`.
+
+        Only extractors with `symbol_rules` are used. No reference date is
+        involved, so the result may be kept and resolved for any number of
+        them; with a cache_size it is also memoized per text.
+        """
+        if not text:
+            return []
+        self.check_length(text)
+
+        if self.extractors is None:
+            self.warmup()
+
+        matcher = self.matcher(text, symbolic=True)
+        if matcher is None:
+            return []
+
+        cache = self.cache
+        if cache is not None:
+            # Symbols do not depend on a reference day
+            key = (text, None)
+            cached = cache.get(key)
+            if cached is not None:
+                return list(cached)
+
+        if self.instrument is not None:
+            result = self._instrumented(text, matcher, matcher.extract)
+        else:
+            result = matcher.extract(text)
+        if cache is not None:
+            cache.put(key, tuple(result))
+        return result
+
+    def resolve(self, symbols, ref=None):
+        """Return the dates of the symbols of `parse_symbolic` for ref."""
+        return resolve(symbols, ref)
+
+    def parse_many(self, texts, ref=None, threads=None, chunksize=256):
+        """Parse every string of an iterable and return a list of results.
+
+        The reference date is resolved once for the whole batch, so all the
+        texts are parsed against the same "today". Empty and None entries give
+        an empty list without touching the extractors.
+
+        With threads, chunks of chunksize texts are parsed on a pool of that
+        many threads sharing this parser. Results are the same and in the
+        same order as without.
+        """
+        context = reference_day(ref)
+        if self.extractors is None:
+            self.warmup()
+        cache = self.cache
+        if cache is None:
+            extract = lambda text: self._extract_text(text, ref, context)
+        else:
+            extract = lambda text: self._extract_cached(text, ref, context, cache)
+
+        def parse_chunk(chunk):
+            return [extract(text) if text else [] for text in chunk]
+
+        if not threads or threads < 2:
+            return parse_chunk(texts)
+
+        # Only loaded by the callers who use threads
+        from concurrent.futures import ThreadPoolExecutor
+        texts = list(texts)
+        chunks = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+        result = []
+        with ThreadPoolExecutor(threads) as executor:
+            for results in executor.map(parse_chunk, chunks):
+                result.extend(results)
+        return result
+
+    def parse_columnar(self, texts, ref=None):
+        """Parse a batch of strings into a `Columns` of array backed results.
+
+        Like `parse_matches` for every text, but the matches are packed into
+        parallel arrays tagged with the index of their text instead of being
+        kept as objects.
+        """
+        if self.extractors is None:
+            self.warmup()
+        context = reference_day(ref)
+        columns = Columns(e.name for e in self.ruled)
+        append = columns.append
+        for index, text in enumerate(texts):
+            if not text:
+                continue
+            self.check_length(text)
+            matcher = self.matcher(text)
+            if matcher is None:
+                continue
+            for m, kind, handler, match in matcher.finditer(text):
+                value = handler(match, context)
+                if value is not None:
+                    start, end = m.span()
+                    append(index, start, end, kind, value)
+        return columns
+
+    def parse_stream(self, fileobj, ref=None, chunk_size=65536, overlap=256,
+                     spans=False):
+        """Parse a file-like object chunk by chunk, yielding dates as found.
+
+        With spans, a `Match` is yielded instead of the bare value, with
+        offsets counted from the start of the stream.
+
+        Chunks are scanned with `scan_chunks`, so memory stays bounded by
+        chunk_size + overlap. Binary files are decoded as UTF-8.
+        """
+        if overlap < 1:
+            raise ValueError("overlap must be at least 1")
+
+        if self.extractors is None:
+            self.warmup()
+        context = reference_day(ref)
+
+        def chunks():
+            decoder = None
+            while True:
+                chunk = fileobj.read(chunk_size)
+                eof = not chunk
+                if isinstance(chunk, bytes):
+                    if decoder is None:
+                        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+                    chunk = decoder.decode(chunk, eof)
+                if chunk:
+                    yield chunk
+                if eof:
+                    return
+
+        for hit in self.scan_chunks(chunks(), overlap):
+            if hit is None:
+                continue
+            start, end, m, kind, handler, match = hit
+            value = handler(match, context)
+            if value is not None:
+                if spans:
+                    yield Match(start, end, m.group(), kind, value)
+                else:
+                    yield value
+
+    def scan_chunks(self, chunks, overlap, pos=0, offset=0, stop=None, matcher=None):
+        """Yield the hits of a text given as an iterable of chunks.
+
+        Hits are yielded as (start, end, match object, kind, handler, match)
+        where start and end are counted in the whole text and the rest is
+        as from `Matcher.finditer`, and None is yielded between windows,
+        e.g. to check the time.
+
+        The text is matched window by window. The last overlap characters
+        of every window are carried over to the next one and only matches
+        starting before them are taken, so an expression cut in half by a
+        chunk boundary is still found, and only once. Expressions longer
+        than overlap may be missed at a boundary.
+
+        offset is where the first chunk starts in the text, pos where to
+        start scanning and stop where hits have to start before. Every
+        window is matched by the given matcher, by default by the one for
+        the extractors whose triggers it contains.
+        """
+        chunks = iter(chunks)
+        buffer = ''
+        pos -= offset
+        # End of the last hit of every extractor, where its next scan starts
+        resume = {}
+        while True:
+            chunk = next(chunks, '')
+            eof = not chunk
+            buffer += chunk
+
+            # Matches starting past the cut might still grow with more text
+            if eof:
+                cut = len(buffer)
+            else:
+                cut = len(buffer) - overlap
+            if stop is not None:
+                cut = min(cut, stop - offset)
+            if pos < cut:
+                current = matcher
+                if current is None:
+                    current = self.matcher(buffer[pos:])
+                if current is not None:
+                    starts = dict((kind, end - offset) for kind, end in resume.items()
+                                  if end - offset > pos)
+                    for m, kind, handler, match in current.finditer(buffer, pos, starts):
+                        start, end = m.span()
+                        if start >= cut:
+                            break
+                        yield start + offset, end + offset, m, kind, handler, match
+                        resume[kind] = end + offset
+            if eof or (stop is not None and cut + offset >= stop):
+                return
+            yield None
+
+            # Keep one more character before pos for word boundaries
+            pos = max(pos, cut, 0)
+            start = max(pos - 1, 0)
+            buffer = buffer[start:]
+            pos -= start
+            offset += start
+
+    def check_length(self, text):
+        """Raise ValueError if the text is longer than max_length."""
+        if self.max_length is not None and len(text) > self.max_length:
+            raise ValueError("text of %d characters is longer than max_length %d"
+                             % (len(text), self.max_length))
+
+    def set_cache_size(self, cache_size):
+        """Replace the result cache by an empty one, 0 turns caching off.
+
+        Results are kept in an `LRUCache` keyed by the text and the
+        reference *date*, since no extractor looks at the time of day.
+        """
+        if cache_size:
+            self.cache = LRUCache(cache_size)
+        else:
+            self.cache = None
+
+    def set_instrument(self, instrument):
+        """Start recording into an `Instrumentation`, None to stop."""
+        self.instrument = instrument
+        if self.extractors is not None:
+            # Matchers are rebuilt on demand with or without timed handlers
+            self.matchers = {}
+            self.symbolic_matchers = {}
+            self.lazy_matchers = {}
+
+    def cache_info(self):
+        """Return the statistics of the result cache, None if disabled."""
+        cache = self.cache
+        if cache is not None:
+            return cache.info()
+
+    def extract(self, text, ref=None):
+        """Extract dates & times of a string against a reference datetime."""
+        return self._extract_text(text, ref, reference_day(ref))
+
+    def _extract_text(self, text, ref, context):
+        self.check_length(text)
+        if self.extractors is None:
+            self.warmup()
+        return self._extract(text, self.matcher(text), ref, context)
+
+    def _extract_cached(self, text, ref, context, cache):
+        self.check_length(text)
+        matcher = self.matcher(text)
+        if matcher is None and not self.fallback:
+            # Like parse, text which cannot match is not worth a cache entry
+            return self._extract(text, matcher, ref, context)
+        key = (text, context.today)
+        cached = cache.get(key)
+        if cached is None:
+            cached = tuple(self._extract(text, matcher, ref, context))
+            cache.put(key, cached)
+        return list(cached)
+
+    def _extract(self, text, matcher, ref, context):
+        if self.instrument is not None:
+            return self._extract_instrumented(text, matcher, ref, context)
+
+        if matcher is None:
+            result = []
+        else:
+            result = matcher.extract(text, context)
+        for name, extract in self.fallback:
+            out = extract(text, ref, context)
+            if out:
+                result.extend(out)
+
+        return result
+
+    def _iter(self, text, matcher, ref, context, spans=False):
+        if matcher is not None:
+            for m, kind, handler, match in matcher.finditer(text):
+                value = handler(match, context)
+                if value is not None:
+                    if spans:
+                        start, end = m.span()
+                        yield Match(start, end, m.group(), kind, value)
+                    else:
+                        yield value
+        if not spans:
+            for name, extract in self.fallback:
+                for value in extract(text, ref, context) or ():
+                    yield value
+
+    def _extract_instrumented(self, text, matcher, ref, context):
+        instrument = self.instrument
+        if matcher is None:
+            instrument.record('skipped', input_size=len(text))
+            result = []
+        else:
+            result = self._instrumented(text, matcher, matcher.extract, context)
+
+        timer = time.perf_counter
+        for name, extract in self.fallback:
+            start = timer()
+            out = extract(text, ref, context)
+            instrument.record(name, timer() - start, len(out or ()), len(text))
+            if out:
+                result.extend(out)
+
+        return result
+
+    def _instrumented(self, text, matcher, scan, context=None):
+        instrument = self.instrument
+        size = len(text)
+        for kind in matcher.kinds:
+            instrument.record(kind, input_size=size)
+        start = time.perf_counter()
+        result = scan(text, context)
+        instrument.record('parse', time.perf_counter() - start, len(result), size)
+        return result
+
+    def matcher(self, text, symbolic=False, lazy=False):
+        """Return a matcher for the extractors which may match the text.
+
+        Only extractors with one of their trigger words in the lowered text
+        take part. Matchers are built on demand for every combination of
+        extractors and kept for later calls. Returns None if no extractor
+        can match. With symbolic, the matcher runs the `symbol_rules` of the
+        extractors. With lazy, it never tokenizes, as splitting the whole
+        text up front would cost more than a scan which stops at the first
+        hits.
+        """
+        lowered = text.lower()
+        active = tuple(i for i, extractor in enumerate(self.ruled)
+                       if not extractor.triggers or
+                       any(word in lowered for word in extractor.triggers))
+        if not active:
+            return None
+
+        if symbolic:
+            matchers = self.symbolic_matchers
+        elif lazy and self.tokenize:
+            matchers = self.lazy_matchers
+        else:
+            matchers = self.matchers
+        matcher = matchers.get(active)
+        if matcher is None:
+            matcher = matchers[active] = self.build_matcher(active, symbolic, lazy)
+        return matcher
+
+    def build_matcher(self, active, symbolic=False, lazy=False):
+        """Build a matcher for the extractors at the given indexes."""
+        wrap = None
+        if self.instrument is not None:
+            wrap = self.instrument.wrap
+        if symbolic:
+            return Matcher((self.ruled[i] for i in active), wrap, symbolic=True)
+        if self.tokenize and not lazy:
+            return TokenMatcher((self.ruled[i] for i in active), wrap)
+        return Matcher((self.ruled[i] for i in active), wrap)
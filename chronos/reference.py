@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Precomputed answers for everything relative to a reference day."""
+
+import datetime
+
+from .holidays import calendar
+
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Length of the units in days, assuming 30 days to a month and 365 to a year
+UNIT_DAYS = {'day': 1, 'week': 7, 'month': 30, 'year': 365}
+
+# Length of the units used by "last/next week/month/year"
+UNITS = [(unit, datetime.timedelta(days=UNIT_DAYS[unit])) for unit in ('week', 'month', 'year')]
+
+
+class ReferenceDay(object):
+    """Lookup tables for every finite expression relative to one day.
+
+    Built once per calendar day, so extractors only do dictionary lookups for
+    words like "tomorrow", "last week", "next friday" or "christmas".
+    """
+
+    def __init__(self, today):
+        self.today = today
+        self.year = today.year
+
+        one_day = datetime.timedelta(days=1)
+        self.days = {'yesterday': today - one_day,
+                     'tomorrow': today + one_day,
+                     'today': today,
+                     'day before yesterday': today - 2 * one_day,
+                     'day after tomorrow': today + 2 * one_day,
+                     }
+
+        self.last_next = {}
+        for unit, delta in UNITS:
+            self.last_next[('last', unit)] = today - delta
+            self.last_next[('next', unit)] = today + delta
+
+        self.weekdays = {}
+        today_num = today.weekday()
+        for match_num, day in enumerate(WEEKDAYS):
+            # last wednesday, last friday, etc.
+            if today_num >= match_num:
+                if today_num - match_num == 0: # matched day is also today
+                    delta = datetime.timedelta(days=7)
+                else:
+                    delta = datetime.timedelta(days=today_num - match_num)
+            else:
+                delta = datetime.timedelta(days=7-today_num)
+            self.weekdays[('last', day)] = today - delta
+
+            # next wednesday, next friday, etc.
+            if today_num >= match_num:
+                delta = datetime.timedelta(days=7 + match_num - today_num)
+            else:
+                delta = datetime.timedelta(match_num - today_num)
+            self.weekdays[('next', day)] = today + delta
+
+        # Shared by every day of the year
+        self.holidays = calendar.dates(self.year)
+
+
+# Reference days built so far, by date
+_reference_days = {}
+
+
+def reference_day(ref=None):
+    """Return the ReferenceDay for a reference datetime, today if None.
+
+    Tables are built the first time a date is seen and reused afterwards.
+    Without a ref the current date is looked up on every call, so long
+    running processes move on to the next day at midnight by themselves.
+    """
+    if ref:
+        today = ref.date()
+    else:
+        today = datetime.date.today()
+
+    context = _reference_days.get(today)
+    if context is None:
+        if len(_reference_days) >= 1024:
+            _reference_days.clear()
+        context = _reference_days[today] = ReferenceDay(today)
+    return context
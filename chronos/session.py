@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Incremental parsing of a text which grows or is edited over time."""
+
+import collections
+
+from .matcher import Match
+from .reference import reference_day
+
+
+# Matches which disappeared and appeared with a change, see `Session.edit`
+Change = collections.namedtuple('Change', 'added removed')
+
+
+def moved(match, delta):
+    """Return the match shifted by delta characters."""
+    if not delta:
+        return match
+    return Match(match.start + delta, match.end + delta, match.text, match.kind, match.value)
+
+
+class Session(object):
+    """Keeps the matches of a text up to date as it is edited.
+
+    Instead of parsing the whole text again after every change, only a
+    window of overlap characters on both sides of the edited range is
+    scanned again with `Parser.scan_chunks`; matches outside of it are kept
+    and moved along.
+
+    The spans of hits which gave no date, like "in 3 days ago", are kept
+    too, so a window never starts scanning from the middle of one.
+    """
+
+    def __init__(self, parser=None, ref=None, text='', overlap=256):
+        if overlap < 1:
+            raise ValueError("overlap must be at least 1")
+        if parser is None:
+            from .api import default_parser as parser
+        self.parser = parser
+        self.ref = ref
+        self.overlap = overlap
+        self.text = ''
+        self.matches = []
+        self.dropped = []
+        if text:
+            self.append(text)
+
+    @property
+    def dates(self):
+        """The dates found in the current text, in text order."""
+        return [match.value for match in self.matches]
+
+    def append(self, text):
+        """Add text at the end and return the `Change` of matches."""
+        size = len(self.text)
+        return self.edit(size, size, text)
+
+    def edit(self, start, end, text):
+        """Replace text[start:end] by text and return the `Change` of matches.
+
+        Removed matches carry their positions in the old text, added ones
+        their positions in the new text. Matches found again unchanged at
+        the same (moved) place are in neither.
+        """
+        old = self.text
+        if not 0 <= start <= end <= len(old):
+            raise ValueError("invalid range %d:%d" % (start, end))
+        new = old[:start] + text + old[end:]
+        delta = len(text) - (end - start)
+
+        # Old matches touching the window are scanned again
+        low = max(start - self.overlap, 0)
+        high = min(end + self.overlap, len(old))
+        before = []
+        stale = []
+        after = []
+        for match in self.matches:
+            if match.end <= low:
+                before.append(match)
+            elif match.start >= high:
+                after.append(match)
+            else:
+                stale.append(match)
+        if stale:
+            low = min(low, stale[0].start)
+            high = max(high, stale[-1].end)
+        # A window starting inside a hit without a date would find what the
+        # full scan never sees, so it starts at the hit instead
+        dropped_before = [span for span in self.dropped if span[1] <= low]
+        dropped_after = [span for span in self.dropped if span[0] >= high]
+        for span in self.dropped:
+            if span[0] < low < span[1]:
+                low = span[0]
+        high += delta
+
+        found, dropped = self.scan(new, low, high)
+        last = max(found[-1].end if found else 0, dropped[-1][1] if dropped else 0)
+        # A new hit running into the kept ones wins over them
+        while after and after[0].start + delta < last:
+            stale.append(after.pop(0))
+        while dropped_after and dropped_after[0][0] + delta < last:
+            dropped_after.pop(0)
+        after = [moved(match, delta) for match in after]
+        dropped_after = [(s + delta, e + delta) for s, e in dropped_after]
+
+        added = list(found)
+        removed = []
+        for match in stale:
+            if match.end <= start:
+                same = match
+            elif match.start >= end:
+                same = moved(match, delta)
+            else:
+                same = None
+            if same is not None and same in added:
+                added.remove(same)
+            else:
+                removed.append(match)
+
+        self.text = new
+        self.matches = before + found + after
+        self.dropped = dropped_before + dropped + dropped_after
+        return Change(added, removed)
+
+    def scan(self, text, low, high):
+        """Return the matches of text starting between low and high.
+
+        Also returns the (start, end) spans of the hits without a date.
+        """
+        # One more character on each side for word boundaries, and room for
+        # the last matches to end past high
+        begin = max(low - 1, 0)
+        segment = text[begin:high + self.overlap]
+        if not segment:
+            return [], []
+        parser = self.parser
+        if parser.extractors is None:
+            parser.warmup()
+        context = reference_day(self.ref)
+        found = []
+        dropped = []
+        for hit in parser.scan_chunks([segment], self.overlap, low, begin, high):
+            if hit is None:
+                continue
+            start, end, m, kind, handler, match = hit
+            value = handler(match, context)
+            if value is None:
+                dropped.append((start, end))
+            else:
+                found.append(Match(start, end, m.group(), kind, value))
+        return found, dropped
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Reference independent results, resolved to dates in a second step.
+
+Extractors can describe what they found without looking at the reference
+date, e.g. "3 weeks ago" as ``RelativeOffset(-3, 'week')``. Such results
+only depend on the text, so they can be cached per text and resolved for
+any number of reference dates with a few additions and lookups each.
+"""
+
+import datetime
+import collections
+
+from .reference import reference_day, UNIT_DAYS
+from .holidays import calendar
+
+
+class Absolute(collections.namedtuple('Absolute', 'value')):
+    """A date or datetime which does not depend on the reference."""
+    __slots__ = ()
+
+    def resolve(self, context):
+        return self.value
+
+
+class RelativeOffset(collections.namedtuple('RelativeOffset', 'amount unit')):
+    """amount days, weeks, months or years from the reference day."""
+    __slots__ = ()
+
+    def resolve(self, context):
+        return context.today + datetime.timedelta(days=self.amount * UNIT_DAYS[self.unit])
+
+
+class Weekday(collections.namedtuple('Weekday', 'direction day')):
+    """The last or next weekday of that name, like "next friday"."""
+    __slots__ = ()
+
+    def resolve(self, context):
+        return context.weekdays.get((self.direction, self.day))
+
+
+class Holiday(collections.namedtuple('Holiday', 'name calendar')):
+    """A holiday in the year of the reference, from a `HolidayCalendar`.
+
+    The calendar defaults to the one of all the known holidays.
+    """
+    __slots__ = ()
+
+    def __new__(cls, name, calendar=None):
+        return super(Holiday, cls).__new__(cls, name, calendar)
+
+    def resolve(self, context):
+        if self.calendar is None:
+            return context.holidays[self.name]
+        return self.on(context.year)
+
+    def on(self, year):
+        """Return the date of the holiday in year."""
+        return (self.calendar or calendar).dates(year)[self.name]
+
+
+def resolve(symbols, ref=None):
+    """Return the dates of symbolic results for a reference datetime.
+
+    Symbols which do not resolve to a date are dropped.
+    """
+    context = reference_day(ref)
+    result = []
+    for symbol in symbols:
+        value = symbol.resolve(context)
+        if value is not None:
+            result.append(value)
+    return result
@@ -3,10 +3,38 @@
 
 """Text the basic chronos module"""
 
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
 import unittest
 import datetime
 
-from .api import parse
+try:
+    import numpy
+except ImportError: # pragma: no cover
+    numpy = None
+
+from .api import parse, parse_many, parse_parallel, parse_stream, parse_matches
+from .api import parse_columnar, parse_array, parse_symbolic, parse_at_refs
+from .api import parse_iter, parse_first
+from .vectorized import factorize, resolve_at_refs
+from .matcher import Match
+from .tokens import TokenMatcher
+from .parallel import pack, unpack
+from .cache import LRUCache
+from .reference import reference_day
+from .holidays import HOLIDAYS, HolidayCalendar, easter_sunday
+from .instrument import Instrumentation
+from .cli import main
+from .columnar import to_microseconds, from_microseconds
+from .parser import Parser, ParseResult
+from .session import Session
+from .symbolic import Absolute, RelativeOffset, Weekday, Holiday, resolve
+from .extractor import ChristmasExtractor, ISO8601Extractor
 
 
 class EmptyTestCase(unittest.TestCase):
@@ -83,6 +111,52 @@ class NewYearTestCase(unittest.TestCase):
         self.assertEqual(eve, parse("On new year eve we", self.ref))
 
 
+class HolidayTestCase(unittest.TestCase):
+    """Test for the holiday calendar."""
+    ref = datetime.datetime(2013, 11, 20)
+
+    def test_rules(self):
+        """Fixed, nth weekday and Easter based holidays."""
+        self.assertEqual([datetime.date(2013, 7, 4)], parse("on Independence Day", self.ref))
+        self.assertEqual([datetime.date(2013, 11, 28)], parse("at thanksgiving", self.ref))
+        self.assertEqual([datetime.date(2013, 5, 27)], parse("on memorial day", self.ref))
+        self.assertEqual([datetime.date(2013, 9, 2)], parse("on Labour Day", self.ref))
+        self.assertEqual([datetime.date(2013, 3, 31)], parse("for easter", self.ref))
+        self.assertEqual([datetime.date(2013, 3, 29)], parse("on good friday", self.ref))
+        self.assertEqual([datetime.date(2013, 4, 1)], parse("on Easter Monday", self.ref))
+        self.assertEqual([datetime.date(2013, 12, 26)], parse("on boxing day", self.ref))
+
+    def test_easter(self):
+        """Easter Sunday over a few known years."""
+        for year, month, day in [(2000, 4, 23), (2008, 3, 23), (2011, 4, 24),
+                                 (2019, 4, 21), (2024, 3, 31), (2038, 4, 25)]:
+            self.assertEqual(datetime.date(year, month, day), easter_sunday(year))
+
+    def test_calendar(self):
+        """One pattern for all holidays, dates computed once per year."""
+        calendar = HolidayCalendar()
+        self.assertEqual(len(HOLIDAYS), calendar.pattern.groups)
+        dates = calendar.dates(2013)
+        self.assertTrue(dates is calendar.dates(2013))
+        self.assertEqual(datetime.date(2014, 1, 1), dates['new year'])
+        self.assertEqual(['christmas eve'], calendar.subset(['christmas eve']).names)
+        self.assertTrue('labo' in calendar.triggers)
+
+    def test_triggers(self):
+        """Triggers are the most distinctive words of the holidays."""
+        triggers = HolidayCalendar().triggers
+        self.assertTrue('patrick' in triggers and 'st' not in triggers)
+        self.assertTrue('good' not in triggers)
+        self.assertEqual([datetime.date(2013, 3, 17), datetime.date(2013, 3, 29)],
+                         parse("st. patrick's day and good friday", self.ref))
+
+    def test_subset(self):
+        """Christmas and new year extractors only see their own holidays."""
+        parser = Parser([ChristmasExtractor])
+        self.assertEqual([datetime.date(2013, 12, 25)],
+                         parser.parse("christmas or thanksgiving", self.ref))
+
+
 class ISOTestCase(unittest.TestCase):
     """Test for dates formatted using the ISO 8601 format."""
     ref = datetime.datetime.utcfromtimestamp(25920000)
@@ -137,6 +211,53 @@ class ISOTestCase(unittest.TestCase):
                   datetime.datetime(1990, 1, 1, 10, 10, 10)]
         self.assertEqual(output, parse(text, self.ref))
 
+    def test_fraction_offset(self):
+        """Test fractional seconds and UTC offsets."""
+        utc = datetime.timezone.utc
+        ist = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+        self.assertEqual([datetime.datetime(1990, 1, 1, 10, 10, 10, 500000)],
+                         parse("In 1990-01-01T10:10:10.5 we"))
+        self.assertEqual([datetime.datetime(1990, 1, 1, 10, 10, 10, 123000)],
+                         parse("In 1990-01-01T10:10:10,123 we"))
+        self.assertEqual([datetime.datetime(1990, 1, 1, 10, 30)],
+                         parse("In 1990-01-01T10.5 we"))
+        self.assertEqual([datetime.datetime(1990, 1, 1, 10, 10, 10, tzinfo=utc)],
+                         parse("In 1990-01-01T10:10:10Z we"))
+        self.assertEqual([datetime.datetime(1990, 1, 1, 10, 10, tzinfo=ist)],
+                         parse("In 1990-01-01T10:10+05:30 we"))
+        self.assertEqual([datetime.datetime(1990, 1, 1, 10, tzinfo=utc)],
+                         parse("In 1990-01-01T15+05 we"))
+
+    def test_basic_format(self):
+        """Test the basic format without separators."""
+        utc = datetime.timezone.utc
+        self.assertEqual([datetime.datetime(1990, 1, 1, 10, 10, 10)],
+                         parse("In 19900101T101010 we"))
+        self.assertEqual([datetime.datetime(1990, 1, 1, 10, 10, 10, tzinfo=utc)],
+                         parse("In 19900101T151010+0500 we"))
+        # Without a time, a bare number is not taken for a date
+        self.assertEqual([], parse("order 19900101 shipped"))
+
+    def test_week_ordinal(self):
+        """Test week dates and ordinal dates."""
+        self.assertEqual([datetime.datetime(2020, 1, 1)], parse("In 2020-W01-3 we"))
+        self.assertEqual([datetime.datetime(2019, 12, 30)], parse("In 2020W01 we"))
+        self.assertEqual([datetime.datetime(2020, 12, 31)], parse("In 2020-366 we"))
+        self.assertEqual([datetime.datetime(2020, 5, 2, 10)], parse("In 2020123T10 we"))
+        self.assertEqual([datetime.datetime(2020, 12, 28)], parse("In 2020-W53-1 we"))
+        self.assertEqual([datetime.datetime(2010, 1, 3)], parse("In 2009-W53-7 we"))
+
+    def test_invalid(self):
+        """Out of range values are dropped instead of raising."""
+        self.assertEqual([], parse("In 1990-13-01 we"))
+        self.assertEqual([], parse("In 2021-366 we"))
+        self.assertEqual([], parse("In 2021-W53 we"))
+        self.assertEqual([], parse("In 2021-W00 we"))
+        self.assertEqual([], parse("In 2021-W01-8 we"))
+        self.assertEqual([], parse("In 9999-12-31T24:00 we"))
+        self.assertEqual([], parse("In 1990-01-01T25:00 we"))
+        self.assertEqual([datetime.datetime(1990, 1, 2)], parse("In 1990-01-01T24:00 we"))
+
 
 class WordDaysTestCase(unittest.TestCase):
     """Tests for relative days like today, tomorrow, yesterday, etc."""
@@ -164,6 +285,10 @@ class WordDaysTestCase(unittest.TestCase):
 
         self.assertEqual([yesterday, today, tomorrow],
                          parse("foo yesterday, today and tomorrow bar"))
+        # "a day" is no date of its own and leaves the rest to the day
+        self.assertEqual([da_tomorrow], parse("foo a day after tomorrow bar"))
+        self.assertEqual([da_tomorrow],
+                         Parser(tokenize=True).parse("foo a day after tomorrow bar"))
 
     def test_n_days(self):
         """Test N days ago, in N days, etc."""
@@ -472,5 +597,772 @@ class WordDaysTestCase(unittest.TestCase):
         self.assertEqual([next_fri], parse("foo next friday bar"))
 
 
+class ParserTestCase(unittest.TestCase):
+    """Tests for the reusable Parser object."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_warmup(self):
+        """Extractors are built once and reused across calls."""
+        parser = Parser()
+        self.assertTrue(parser.warmup() is parser)
+        extractors = parser.extractors
+        parser.parse("foo today bar")
+        parser.parse("foo christmas bar", self.ref)
+        self.assertTrue(parser.extractors is extractors)
+
+    def test_ref_per_call(self):
+        """The same parser honours a different ref on every call."""
+        parser = Parser()
+        today = datetime.date.today()
+        ref_day = self.ref.date()
+        self.assertEqual([ref_day], parser.parse("foo today bar", self.ref))
+        self.assertEqual([today], parser.parse("foo today bar"))
+        self.assertEqual([ref_day], parser.parse("foo today bar", self.ref))
+
+    def test_triggers(self):
+        """Extractors without any trigger word in the text are skipped."""
+        parser = Parser().warmup()
+        self.assertEqual(None, parser.matcher("nothing here"))
+        matcher = parser.matcher("Merry CHRISTMAS")
+        self.assertEqual(['holiday'], matcher.kinds)
+        self.assertTrue(matcher is parser.matcher("christmas again"))
+        self.assertEqual([datetime.date(self.ref.year, 12, 25)],
+                         parser.parse("Merry CHRISTMAS", self.ref))
+
+    def test_subset(self):
+        """Only the given extractors are used."""
+        parser = Parser([ChristmasExtractor, ISO8601Extractor])
+        self.assertEqual([datetime.date(self.ref.year, 12, 25)],
+                         parser.parse("christmas or tomorrow", self.ref))
+        self.assertEqual([], parser.parse(None))
+
+    def test_tokenize(self):
+        """Matching phrases over tokens finds the same dates."""
+        parser = Parser(tokenize=True)
+        texts = ["In 3 Days and Last Week", "day after tomorrow, 1990-01-01T10",
+                 "next friday or a year ago, christmas eve", "2 weeks back",
+                 "in 3 days ago", "next a week", "nothing here",
+                 # Spacing and word boundaries as in the regexes
+                 "3days ago", "in 2weeks", "next\tfriday", "a\nweek back",
+                 "3  days ago", "in 3 days_ago", "day  after   tomorrow",
+                 "in3 days", "ina week", "3 daysago", "nexta weekback",
+                 "x3 days", "2 weeks agox", "_today", "today_", "3yesterday",
+                 "a day after tomorrow", "3 days before yesterday"]
+        for text in texts:
+            self.assertEqual(parse(text, self.ref), parser.parse(text, self.ref))
+        text = "foo bar " * 20 + "next friday and 1990-01-01T10 " * 5
+        self.assertEqual(parse(text, self.ref),
+                         list(parser.parse_stream(io.StringIO(text), self.ref,
+                                                  chunk_size=7, overlap=20)))
+
+
+class ParseIterTestCase(unittest.TestCase):
+    """Tests for lazy parsing with early exit."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+    text = "tomorrow, not 1990-01-01T10 or christmas eve but in 3 days"
+
+    def test_iter(self):
+        """Values come one at a time, in text order."""
+        values = parse_iter(self.text, self.ref)
+        self.assertEqual(self.ref.date() + datetime.timedelta(days=1), next(values))
+        self.assertEqual(parse(self.text, self.ref)[1:], list(values))
+        self.assertEqual(parse_matches(self.text, self.ref),
+                         list(parse_iter(self.text, self.ref, spans=True)))
+        self.assertEqual([], list(parse_iter(None)))
+
+    def test_first(self):
+        """Only the first value, None if there is none."""
+        self.assertEqual(datetime.datetime(1990, 1, 1, 10),
+                         parse_first("not 1990-01-01T10 or christmas eve", self.ref))
+        self.assertEqual(None, parse_first("nothing here"))
+        self.assertEqual(None, parse_first(""))
+
+    def test_stops_early(self):
+        """Handlers past the last value needed are never called."""
+        instrument = Instrumentation()
+        parser = Parser(instrument=instrument)
+        text = "today " * 1000
+        self.assertEqual([self.ref.date()] * 2, parser.parse(text, self.ref, max_results=2))
+        self.assertEqual(2, instrument.snapshot()['relative_day.extract_day']['calls'])
+
+    def test_long_text(self):
+        """Early exits check the triggers but do not split the text in tokens."""
+        text = "today " + "x " * 100000 + "tomorrow"
+        for parser in (Parser(), Parser(tokenize=True).warmup()):
+            self.assertEqual(self.ref.date(), parser.parse_first(text, self.ref))
+            self.assertEqual([self.ref.date()], parser.parse(text, self.ref, max_results=1))
+            self.assertEqual([self.ref.date()], parser.parse(text, self.ref, max_results=1,
+                                                             budget_ms=1000))
+            self.assertNotIsInstance(parser.matcher(text, lazy=True), TokenMatcher)
+            self.assertEqual(None, parser.matcher("nothing here", lazy=True))
+
+    def test_max_results_cache(self):
+        """Cached results are cut, partial ones are not cached."""
+        parser = Parser(cache_size=10)
+        self.assertEqual(1, len(parser.parse(self.text, self.ref, max_results=1)))
+        self.assertEqual(4, len(parser.parse(self.text, self.ref)))
+        self.assertEqual(2, len(parser.parse(self.text, self.ref, max_results=2)))
+        self.assertEqual(1, parser.cache_info().hits)
+
+
+class ParseManyTestCase(unittest.TestCase):
+    """Tests for parsing a batch of strings with a shared ref."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_batch(self):
+        """Results line up with the inputs."""
+        today = self.ref.date()
+        texts = ["foo today bar", None, "", "nothing here",
+                 "christmas and 1990-01-01", "yesterday or next week"]
+        self.assertEqual([[today],
+                          [],
+                          [],
+                          [],
+                          [datetime.date(self.ref.year, 12, 25),
+                           datetime.datetime(1990, 1, 1)],
+                          [today - datetime.timedelta(days=1),
+                           today + datetime.timedelta(weeks=1)]],
+                         parse_many(texts, self.ref))
+
+    def test_generator(self):
+        """Any iterable is accepted and matches parse for each item."""
+        texts = ["foo %d days ago bar" % i for i in range(10)]
+        self.assertEqual([parse(text, self.ref) for text in texts],
+                         parse_many(iter(texts), self.ref))
+        self.assertEqual([], parse_many([]))
+
+    def test_threads(self):
+        """A pool of threads gives the same results in the same order."""
+        texts = ["foo %d days ago bar" % i for i in range(50)]
+        texts += [None, "", "christmas eve at 1990-01-01T10:10"]
+        parser = Parser()
+        self.assertEqual(parse_many(texts, self.ref),
+                         parser.parse_many(iter(texts), self.ref, threads=4, chunksize=7))
+
+
+class ThreadSafetyTestCase(unittest.TestCase):
+    """Tests for one parser shared by threads with different refs."""
+
+    def test_refs(self):
+        """Concurrent calls never see each other's reference day."""
+        parser = Parser(cache_size=16)
+        texts = ["yesterday", "in 3 days", "next week", "christmas",
+                 "last friday", "tomorrow or 1990-01-01"]
+        refs = [datetime.datetime(2000 + i, 1 + i, 1 + i) for i in range(8)]
+        expected = [[Parser().parse(text, ref) for text in texts] for ref in refs]
+        barrier = threading.Barrier(len(refs))
+        results = [None] * len(refs)
+
+        def work(index):
+            barrier.wait()
+            results[index] = [[parser.parse(text, refs[index]) for text in texts]
+                              for _ in range(50)]
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(len(refs))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for index, runs in enumerate(results):
+            self.assertEqual([expected[index]] * 50, runs)
+
+    def test_cache_swapped(self):
+        """Turning the cache off during a call does not break that call."""
+        parser = Parser()
+
+        class SwappedCache(LRUCache):
+            def get(self, key):
+                # As if another thread called set_cache_size right now
+                parser.set_cache_size(0)
+                return LRUCache.get(self, key)
+
+        ref = datetime.datetime(2013, 11, 20)
+        for call in (lambda: parser.parse("today", ref),
+                     lambda: parser.parse_many(["today"], ref)[0],
+                     lambda: parser.parse_symbolic("today")):
+            parser.cache = SwappedCache(4)
+            self.assertEqual(1, len(call()))
+
+
+class ParallelTestCase(unittest.TestCase):
+    """Tests for parsing with a pool of worker processes."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_order(self):
+        """Results come back in input order, same as a serial parse."""
+        texts = ["foo %d days ago bar" % i for i in range(50)]
+        texts += [None, "", "christmas eve at 1990-01-01T10:10"]
+        self.assertEqual(parse_many(texts, self.ref),
+                         list(parse_parallel(texts, self.ref, workers=2, chunksize=7)))
+
+    def test_pack(self):
+        """Packing and unpacking results gives back the same values."""
+        results = [[datetime.date(1990, 1, 1), datetime.datetime(1990, 1, 1, 10)],
+                   [],
+                   [datetime.date(2000, 2, 29), 7]]
+        counts, values, dates = pack(results)
+        self.assertEqual([2, 0, 2], list(counts))
+        self.assertEqual([0, 2], list(dates))
+        self.assertEqual(results, list(unpack(counts, values, dates)))
+
+
+class CacheTestCase(unittest.TestCase):
+    """Tests for memoizing results in an LRU cache."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_hits(self):
+        """Repeated text and reference date hit the cache."""
+        parser = Parser(cache_size=10)
+        today = self.ref.date()
+        self.assertEqual([today], parser.parse("foo today bar", self.ref))
+        later = self.ref + datetime.timedelta(hours=1)
+        self.assertEqual([today], parser.parse("foo today bar", later))
+        info = parser.cache_info()
+        self.assertEqual((1, 1), (info.hits, info.misses))
+
+        # A different day is a different key
+        next_day = self.ref + datetime.timedelta(days=1)
+        self.assertEqual([next_day.date()], parser.parse("foo today bar", next_day))
+        self.assertEqual(2, parser.cache_info().currsize)
+
+    def test_copies(self):
+        """Changing a returned list does not change the cached result."""
+        parser = Parser(cache_size=10)
+        parser.parse("foo today bar", self.ref).append(None)
+        self.assertEqual([self.ref.date()], parser.parse("foo today bar", self.ref))
+
+    def test_parse_many(self):
+        """Batches use the cache too."""
+        parser = Parser(cache_size=10)
+        texts = ["foo today bar", "in 3 days", "foo today bar", None]
+        self.assertEqual(parse_many(texts, self.ref), parser.parse_many(texts, self.ref))
+        self.assertEqual(1, parser.cache_info().hits)
+
+    def test_parse_many_no_trigger(self):
+        """Texts without a trigger do not evict useful entries."""
+        parser = Parser(cache_size=3)
+        parser.parse_many(["today", "in 3 days", "nothing here", "hello", "plain words"],
+                          self.ref)
+        self.assertEqual(2, parser.cache_info().currsize)
+        parser.parse_many(["today", "in 3 days"], self.ref)
+        self.assertEqual(2, parser.cache_info().hits)
+
+    def test_disabled(self):
+        """No cache unless asked for."""
+        self.assertEqual(None, Parser().cache_info())
+
+    def test_eviction(self):
+        """Least recently used keys are evicted first."""
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.put('c', 3)
+        self.assertEqual(None, cache.get('b'))
+        self.assertEqual(3, cache.get('c'))
+        self.assertEqual((2, 1, 1, 2, 2), tuple(cache.info()))
+        cache.clear()
+        self.assertEqual((0, 0, 0, 2, 0), tuple(cache.info()))
+        self.assertRaises(ValueError, LRUCache, 0)
+
+
+class ReferenceDayTestCase(unittest.TestCase):
+    """Tests for the per day lookup tables."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_reuse(self):
+        """Tables are built once per calendar day."""
+        context = reference_day(self.ref)
+        self.assertTrue(context is reference_day(self.ref + datetime.timedelta(hours=1)))
+        self.assertFalse(context is reference_day(self.ref + datetime.timedelta(days=1)))
+        self.assertEqual(datetime.date.today(), reference_day().today)
+
+    def test_tables(self):
+        """Finite expressions are resolved ahead of time."""
+        context = reference_day(datetime.datetime(2013, 11, 20))  # a wednesday
+        self.assertEqual(datetime.date(2013, 11, 21), context.days['tomorrow'])
+        self.assertEqual(datetime.date(2013, 11, 13), context.last_next[('last', 'week')])
+        self.assertEqual(datetime.date(2013, 11, 13), context.weekdays[('last', 'wednesday')])
+        self.assertEqual(datetime.date(2013, 11, 22), context.weekdays[('next', 'friday')])
+        self.assertEqual(datetime.date(2014, 1, 1), context.holidays['new year'])
+
+
+class SymbolicTestCase(unittest.TestCase):
+    """Tests for reference independent results."""
+
+    def test_symbols(self):
+        """Extractors describe what they found without a reference."""
+        text = "3 weeks ago, christmas eve, next friday, 1990-01-01 and today"
+        self.assertEqual([RelativeOffset(-3, 'week'), Holiday('christmas eve'),
+                          Weekday('next', 'friday'), Absolute(datetime.datetime(1990, 1, 1)),
+                          RelativeOffset(0, 'day')],
+                         parse_symbolic(text))
+        self.assertEqual([], parse_symbolic(None))
+        self.assertEqual([], parse_symbolic("in 3 days ago"))
+
+    def test_resolve(self):
+        """Resolving gives what parsing against the same ref does."""
+        text = ("yesterday, in 2 months, last year, a week back, last sunday, "
+                "new year, thanksgiving and 2013-01-05T10:20")
+        symbols = parse_symbolic(text)
+        for days in range(0, 400, 7):
+            ref = datetime.datetime(2012, 11, 20) + datetime.timedelta(days=days)
+            self.assertEqual(parse(text, ref), resolve(symbols, ref))
+
+    def test_cache(self):
+        """Symbols are cached per text, whatever the reference."""
+        parser = Parser(cache_size=10)
+        self.assertEqual([RelativeOffset(1, 'day')], parser.parse_symbolic("tomorrow"))
+        self.assertEqual([RelativeOffset(1, 'day')], parser.parse_symbolic("tomorrow"))
+        self.assertEqual(1, parser.cache_info().hits)
+
+
+class SessionTestCase(unittest.TestCase):
+    """Tests for incremental parsing of edited text."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_append(self):
+        """Typing a message character by character finds what a full parse does."""
+        text = "see you tomorrow, or next friday. " * 3 + "not 1990-01-01T10 but christmas eve"
+        session = Session(ref=self.ref, overlap=30)
+        for char in text:
+            session.append(char)
+        self.assertEqual(parse_matches(text, self.ref), session.matches)
+        self.assertEqual(parse(text, self.ref), session.dates)
+
+    def test_change(self):
+        """Only the matches which changed are reported."""
+        today = self.ref.date()
+        session = Session(ref=self.ref, text="today, then christmas and in 3 days")
+        change = session.edit(0, 5, "yesterday")
+        self.assertEqual([Match(0, 9, 'yesterday', 'relative_day',
+                                today - datetime.timedelta(days=1))], change.added)
+        self.assertEqual([Match(0, 5, 'today', 'relative_day', today)], change.removed)
+        self.assertEqual(parse_matches(session.text, self.ref), session.matches)
+
+        # "in 3 days ago" is not a date
+        change = session.append(" ago")
+        self.assertEqual([], change.added)
+        self.assertEqual(['in 3 days'], [m.text.strip() for m in change.removed])
+        self.assertEqual(2, len(session.matches))
+        self.assertRaises(ValueError, session.edit, 5, 2, "")
+
+    def test_edit_far(self):
+        """Matches far from the edit are kept and moved along."""
+        text = "today " + "foo " * 100 + "tomorrow"
+        session = Session(ref=self.ref, text=text, overlap=20)
+        change = session.edit(6, 6, "bar ")
+        self.assertEqual(([], []), change)
+        self.assertEqual(parse_matches(session.text, self.ref), session.matches)
+
+    def test_edit_after_dropped(self):
+        """A window never starts scanning inside a phrase which is not a date."""
+        text = "in a month back" + " " * 30
+        session = Session(ref=self.ref, text=text, overlap=20)
+        self.assertEqual([], session.matches)
+        # The window starts right at "a month back"
+        change = session.edit(23, 23, "foo")
+        self.assertEqual(([], []), change)
+        self.assertEqual(parse_matches(session.text, self.ref), session.matches)
+
+
+class StreamTestCase(unittest.TestCase):
+    """Tests for parsing file-like objects chunk by chunk."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+    text = ("we met the day after tomorrow, christmas eve and 1990-01-01T10:10:10 "
+            "or in 3 days ago, no, in 3 days. Then next friday and yesterday.")
+
+    def test_boundaries(self):
+        """Whatever the chunk size, results match a parse of the whole text."""
+        expected = parse(self.text, self.ref)
+        self.assertEqual(6, len(expected))
+        for chunk_size in range(1, 40):
+            out = list(parse_stream(io.StringIO(self.text), self.ref,
+                                    chunk_size=chunk_size, overlap=32))
+            self.assertEqual(expected, out)
+
+    def test_bytes(self):
+        """Binary files are decoded on the fly."""
+        data = ("caf\xe9 " + self.text).encode('utf-8')
+        for chunk_size in (1, 3):
+            self.assertEqual(parse(self.text, self.ref),
+                             list(parse_stream(io.BytesIO(data), self.ref,
+                                               chunk_size=chunk_size)))
+
+    def test_empty(self):
+        """Empty files give nothing."""
+        self.assertEqual([], list(parse_stream(io.StringIO(''))))
+        self.assertRaises(ValueError, list, parse_stream(io.StringIO('today'), overlap=0))
+
+
+class MatchTestCase(unittest.TestCase):
+    """Tests for results with source spans."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_spans(self):
+        """Matches carry offsets, text and kind, sorted by position."""
+        text = "Tomorrow, not 1990-01-01 but christmas"
+        today = self.ref.date()
+        matches = parse_matches(text, self.ref)
+        self.assertEqual([Match(0, 8, 'Tomorrow', 'relative_day', today + datetime.timedelta(days=1)),
+                          Match(14, 24, '1990-01-01', 'iso8601', datetime.datetime(1990, 1, 1)),
+                          Match(29, 38, 'christmas', 'holiday', datetime.date(self.ref.year, 12, 25))],
+                         matches)
+        for match in matches:
+            self.assertEqual(match.text, text[match.start:match.end])
+        self.assertEqual([m.value for m in matches], parse(text, self.ref))
+        self.assertEqual([], parse_matches(None))
+        self.assertEqual([], parse_matches("nothing here"))
+
+    def test_slots(self):
+        """Matches do not carry a per instance dict."""
+        match = Match(0, 5, 'today', 'relative_day', None)
+        self.assertFalse(hasattr(match, '__dict__'))
+        self.assertEqual("Match(0, 5, 'today', 'relative_day', None)", repr(match))
+        self.assertNotEqual(match, Match(0, 5, 'today', 'relative_day', 1))
+
+    def test_stream(self):
+        """Stream offsets count from the start of the stream."""
+        text = "foo bar " * 20 + "next friday and 1990-01-01T10 " * 5
+        out = list(parse_stream(io.StringIO(text), self.ref, chunk_size=7,
+                                overlap=20, spans=True))
+        self.assertEqual(parse_matches(text, self.ref), out)
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    """Tests for recording timings and counts."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_snapshot(self):
+        """Scans, extractors and rule handlers are all counted."""
+        instrument = Instrumentation()
+        parser = Parser(instrument=instrument)
+        parser.parse("today and tomorrow, not christmas", self.ref)
+        parser.parse("nothing here", self.ref)
+        stats = instrument.snapshot()
+
+        self.assertEqual(1, stats['parse']['calls'])
+        self.assertEqual(3, stats['parse']['matches'])
+        self.assertEqual(1, stats['skipped']['calls'])
+        self.assertEqual(2, stats['relative_day.extract_day']['calls'])
+        self.assertEqual(2, stats['relative_day']['matches'])
+        self.assertEqual(1, stats['relative_day']['calls'])
+        self.assertEqual(33, stats['relative_day']['input_size'])
+        self.assertEqual(1, stats['holiday.extract_holiday']['matches'])
+        self.assertFalse('iso8601' in stats)
+        self.assertEqual(2, sum(stats['relative_day.extract_day']['histogram']))
+
+        instrument.reset()
+        self.assertEqual({}, instrument.snapshot())
+
+    def test_sink(self):
+        """Sinks see every record."""
+        records = []
+        instrument = Instrumentation([lambda *args: records.append(args)])
+        parser = Parser()
+        self.assertEqual([self.ref.date()], parser.parse("foo today bar", self.ref))
+        parser.set_instrument(instrument)
+        self.assertEqual([self.ref.date()], parser.parse("foo today bar", self.ref))
+        self.assertEqual([('relative_day', 1), ('relative_day.extract_day', 1),
+                          ('relative_day', 0), ('parse', 1)],
+                         [(record[0], record[4]) for record in records])
+        # Summing calls per key gives the counts of the snapshot
+        stats = instrument.snapshot()
+        for key in stats:
+            self.assertEqual(stats[key]['calls'],
+                             sum(record[4] for record in records if record[0] == key))
+        parser.set_instrument(None)
+        parser.parse("foo today bar", self.ref)
+        self.assertEqual(4, len(records))
+
+
+class CommandLineTestCase(unittest.TestCase):
+    """Tests for python -m chronos."""
+
+    def run_main(self, lines, *args):
+        handle, path = tempfile.mkstemp()
+        with os.fdopen(handle, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            self.assertEqual(0, main(list(args) + ['--ref', '2013-11-20', path]))
+            return sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+            os.remove(path)
+
+    def test_jsonl(self):
+        """Plain lines give one JSON record per line."""
+        out = self.run_main(['see you tomorrow', 'nothing', '1990-01-01T10'])
+        self.assertEqual([{'line': 1, 'dates': ['2013-11-21']},
+                          {'line': 2, 'dates': []},
+                          {'line': 3, 'dates': ['1990-01-01T10:00:00']}],
+                         [json.loads(line) for line in out.splitlines()])
+
+    def test_records(self):
+        """JSON records are passed through with the dates added."""
+        out = self.run_main(['{"id": 7, "body": "next friday"}'],
+                            '--input-format', 'jsonl', '--field', 'body')
+        self.assertEqual({'id': 7, 'body': 'next friday', 'dates': ['2013-11-22']},
+                         json.loads(out))
+
+    def test_bad_records(self):
+        """Bad JSON lines are reported and give no dates, the rest is parsed."""
+        stderr = sys.stderr
+        sys.stderr = io.StringIO()
+        try:
+            out = self.run_main(['[1]', '{"text": 5}', '{"text": "today', '{"text": "today"}'],
+                                '--input-format', 'jsonl')
+            errors = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        self.assertEqual([{'line': 1, 'dates': []},
+                          {'text': 5, 'dates': []},
+                          {'line': 3, 'dates': []},
+                          {'text': 'today', 'dates': ['2013-11-20']}],
+                         [json.loads(line) for line in out.splitlines()])
+        self.assertEqual(2, len(errors.splitlines()))
+        self.assertTrue(errors.startswith('chronos: line 1: not a JSON object'))
+        self.assertIn('chronos: line 3: invalid JSON', errors)
+
+    def test_blank_lines(self):
+        """Line numbers are those of the input, blank JSONL lines included."""
+        lines = ['{"text": "today"}', '', '', 'not json', '{"text": "tomorrow"}']
+        stderr = sys.stderr
+        sys.stderr = io.StringIO()
+        try:
+            out = self.run_main(lines, '--input-format', 'jsonl')
+            csv_out = self.run_main(lines, '--input-format', 'jsonl', '--format', 'csv')
+            errors = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        self.assertEqual([{'text': 'today', 'dates': ['2013-11-20']},
+                          {'line': 4, 'dates': []},
+                          {'text': 'tomorrow', 'dates': ['2013-11-21']}],
+                         [json.loads(line) for line in out.splitlines()])
+        self.assertEqual(['line,date', '1,2013-11-20', '5,2013-11-21'],
+                         csv_out.splitlines())
+        self.assertIn('chronos: line 4: invalid JSON', errors)
+
+    def test_bad_extractor(self):
+        """Unknown extractors are a usage error."""
+        stderr = sys.stderr
+        sys.stderr = io.StringIO()
+        try:
+            with self.assertRaises(SystemExit) as raised:
+                main(['--extractor', 'bogus'])
+            errors = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        self.assertEqual(2, raised.exception.code)
+        self.assertIn("invalid choice: 'bogus'", errors)
+
+    def test_csv_workers(self):
+        """CSV has a row per date, also when parsed by several processes."""
+        lines = ['in %d days' % i for i in range(1, 6)]
+        out = self.run_main(lines, '--format', 'csv', '--workers', '2',
+                            '--chunksize', '2', '--buffer', '2')
+        self.assertEqual(['line,date', '1,2013-11-21', '2,2013-11-22',
+                          '3,2013-11-23', '4,2013-11-24', '5,2013-11-25'],
+                         out.splitlines())
+
+
+class ColumnarTestCase(unittest.TestCase):
+    """Tests for array backed batch results."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_columns(self):
+        """Every match is a row of the columns, tagged with its text."""
+        texts = ["foo today bar", None, "nothing", "1990-01-01T10:10:10.5 or christmas"]
+        columns = parse_columnar(texts, self.ref)
+        self.assertEqual(3, len(columns))
+        self.assertEqual([(0, 4, 9, 'relative_day', self.ref.date()),
+                          (3, 0, 21, 'iso8601', datetime.datetime(1990, 1, 1, 10, 10, 10, 500000)),
+                          (3, 25, 34, 'holiday', datetime.date(self.ref.year, 12, 25))],
+                         list(columns.rows()))
+        self.assertEqual(3 * 34, columns.nbytes())
+
+    def test_same_as_matches(self):
+        """Rows match parse_matches of every text."""
+        texts = ["in %d days and 2013-01-%02d" % (i, i) for i in range(1, 20)]
+        expected = [(i, m.start, m.end, m.kind, m.value)
+                    for i, text in enumerate(texts)
+                    for m in parse_matches(text, self.ref)]
+        self.assertEqual(expected, list(parse_columnar(texts, self.ref).rows()))
+
+    def test_microseconds(self):
+        """Values round trip through microseconds since the epoch."""
+        utc_plus_one = datetime.timezone(datetime.timedelta(hours=1))
+        self.assertEqual(0, to_microseconds(datetime.date(1970, 1, 1)))
+        self.assertEqual(1500000, to_microseconds(datetime.datetime(1970, 1, 1, 0, 0, 1, 500000)))
+        self.assertEqual(0, to_microseconds(datetime.datetime(1970, 1, 1, 1, tzinfo=utc_plus_one)))
+        self.assertEqual(datetime.date(1960, 5, 17),
+                         from_microseconds(to_microseconds(datetime.date(1960, 5, 17)), True))
+        value = datetime.datetime(1960, 5, 17, 23, 59, 59, 999999)
+        self.assertEqual(value, from_microseconds(to_microseconds(value), False))
+
+
+class ArrayTestCase(unittest.TestCase):
+    """Tests for parsing columns of repeated values."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_factorize(self):
+        """Repeated values share a code, anything but strings is None."""
+        self.assertEqual(([0, 1, 0, 2, 2], ['a', 'b', None]),
+                         factorize(['a', 'b', 'a', None, float('nan')]))
+
+    def test_list(self):
+        """Each row gets the dates of its text."""
+        today = self.ref.date()
+        values = ["foo today", "nothing", "foo today", None, "in 3 days"]
+        out = parse_array(values, self.ref)
+        self.assertEqual([(today,), (), (today,), (), (today + datetime.timedelta(days=3),)], out)
+        self.assertTrue(out[0] is out[2])
+
+    @unittest.skipIf(numpy is None, "needs numpy")
+    def test_first(self):
+        """The first date of every row as datetime64, NaT if none."""
+        out = parse_array(numpy.array(["foo today", None, "1990-01-01T10"], dtype=object),
+                          self.ref, first=True)
+        self.assertEqual(numpy.dtype('datetime64[us]'), out.dtype)
+        self.assertEqual(numpy.datetime64(self.ref.date().isoformat(), 'us'), out[0])
+        self.assertTrue(numpy.isnat(out[1]))
+        self.assertEqual(numpy.datetime64('1990-01-01T10', 'us'), out[2])
+
+
+class MultipleRefsTestCase(unittest.TestCase):
+    """Tests for resolving matches at many reference dates."""
+    text = ("yesterday, in 2 months, last year, last sunday, next friday, "
+            "new year, thanksgiving and 2013-01-05T10:20")
+    refs = [datetime.datetime(2012, 11, 20) + datetime.timedelta(days=days)
+            for days in range(0, 400, 3)]
+
+    def test_python(self):
+        """Without NumPy every row holds the dates of the symbols."""
+        saved = sys.modules.get('numpy')
+        sys.modules['numpy'] = None
+        try:
+            rows = resolve_at_refs(parse_symbolic(self.text), self.refs)
+        finally:
+            if saved is None:
+                del sys.modules['numpy']
+            else:
+                sys.modules['numpy'] = saved
+        self.assertEqual([parse(self.text, ref) for ref in self.refs], rows)
+
+    @unittest.skipIf(numpy is None, "needs numpy")
+    def test_numpy(self):
+        """A ref x match datetime64 matrix, row i as parsed against refs[i]."""
+        matrix = parse_at_refs(self.text, self.refs)
+        self.assertEqual((len(self.refs), 8), matrix.shape)
+        for ref, row in zip(self.refs, matrix):
+            expected = [numpy.datetime64(value, 'us') for value in parse(self.text, ref)]
+            self.assertEqual(expected, list(row))
+
+    @unittest.skipIf(numpy is None, "needs numpy")
+    def test_texts(self):
+        """A list of texts gives a matrix per text."""
+        matrices = parse_at_refs(["today", "nothing", None], self.refs[:2])
+        self.assertEqual([(2, 1), (2, 0), (2, 0)], [m.shape for m in matrices])
+
+
+class PathologicalInputTestCase(unittest.TestCase):
+    """Latency on adversarial input grows linearly with its length."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+    inputs = [lambda n: "in " * (n // 3),
+              lambda n: "nextin" * (n // 6) + " 3 days",
+              lambda n: "1" * n,
+              lambda n: "1 " * (n // 2),
+              lambda n: "a " * (n // 2) + "day",
+              lambda n: "next " * (n // 5) + "week",
+              lambda n: " day" * (n // 4),
+              lambda n: " " * n + "today",
+              lambda n: "2 weeks " * (n // 8),
+              lambda n: "2013-" * (n // 5),
+              lambda n: "2013-01-01T" * (n // 11),
+              lambda n: "2013-01-01T10:10:10." + "1" * n,
+              lambda n: "christmas eve " * (n // 14),
+              lambda n: "new year's " * (n // 11),
+              lambda n: "st. patrick" * (n // 11),
+              ]
+
+    def elapsed(self, parser, text):
+        """CPU time of the best of several runs, so a busy machine does not
+        skew it."""
+        best = None
+        for _ in range(5):
+            start = time.process_time()
+            parser.parse(text, self.ref)
+            elapsed = time.process_time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def test_linear(self):
+        """Sixteen times the input takes nowhere near 256 times as long."""
+        for tokenize in (False, True):
+            parser = Parser(tokenize=tokenize).warmup()
+            for make in self.inputs:
+                small = self.elapsed(parser, make(2500))
+                large = self.elapsed(parser, make(40000))
+                self.assertTrue(large < 2.0, (make(20), large))
+                self.assertTrue(large < 80 * small + 0.05, (make(20), small, large))
+
+    def test_long_fraction(self):
+        """Digits of a fraction past any precision are ignored."""
+        self.assertEqual([datetime.datetime(2013, 1, 1, 10, 10, 10, 111111)],
+                         parse("2013-01-01T10:10:10." + "1" * 10000))
+
+    def test_max_length(self):
+        """Texts longer than max_length are refused."""
+        parser = Parser(max_length=20)
+        self.assertEqual([self.ref.date()], parser.parse("today", self.ref))
+        self.assertRaises(ValueError, parser.parse, "today " * 10, self.ref)
+        self.assertRaises(ValueError, parser.parse_matches, "today " * 10, self.ref)
+        self.assertRaises(ValueError, parser.parse_many, ["today", "today " * 10], self.ref)
+
+
+class BudgetTestCase(unittest.TestCase):
+    """Tests for parsing within a time budget."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def test_complete(self):
+        """In time, the results are the same across windows of long text."""
+        from .parser import BUDGET_WINDOW
+        # Expressions straddling the first window boundaries
+        text = ("x" * (BUDGET_WINDOW - 5) + " in 3 days " +
+                "y" * (BUDGET_WINDOW - 20) + " christmas eve 1990-01-01T10:10 ") * 3
+        result = Parser().parse(text, self.ref, budget_ms=10000)
+        self.assertEqual(parse(text, self.ref), result)
+        self.assertFalse(result.incomplete)
+        self.assertEqual([self.ref.date()], parse("today", self.ref, max_results=1,
+                                                  budget_ms=10000))
+        self.assertEqual([], parse("today", self.ref, max_results=0, budget_ms=10000))
+        result = Parser(tokenize=True).parse(text, self.ref, budget_ms=10000)
+        self.assertEqual(parse(text, self.ref), result)
+
+    def test_exceeded(self):
+        """Past the deadline, whatever was found is returned flagged."""
+        instrument = Instrumentation()
+        parser = Parser(instrument=instrument, cache_size=4)
+        result = parser.parse("today and tomorrow", self.ref, deadline=time.monotonic() - 1)
+        self.assertEqual([], result)
+        self.assertTrue(result.incomplete)
+        self.assertEqual(1, instrument.snapshot()['budget_exceeded']['calls'])
+        # Partial results are not cached
+        result = parser.parse("today and tomorrow", self.ref, budget_ms=10000)
+        self.assertEqual(2, len(result))
+        self.assertFalse(result.incomplete)
+
+    def test_parser_budget(self):
+        """The parser's budget applies to every parse, results are a prefix."""
+        text = "in 3 days " * 50000
+        full = parse(text, self.ref)
+        result = Parser(budget_ms=1).parse(text, self.ref)
+        self.assertIsInstance(result, ParseResult)
+        self.assertEqual(full[:len(result)], result)
+        self.assertTrue(result.incomplete)
+
+
 if __name__ == '__main__': # pragma: no cover
     unittest.main()
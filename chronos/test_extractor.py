@@ -1,9 +1,18 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import re
 import unittest
+import datetime
 
 from .extractor import Extractor
+from .extractor import ChristmasExtractor, ISO8601Extractor, RelativeDayExtractor
+from .extractor import register, get_extractor, extractor_names
+from .extractor.registry import registry
+from .matcher import Matcher
+from .tokens import TokenMatcher, parse_phrase
+from .parser import Parser
+from .reference import reference_day
 
 
 class BaseExtractorTestCase(unittest.TestCase):
@@ -12,5 +21,162 @@ class BaseExtractorTestCase(unittest.TestCase):
         self.assertRaises(NotImplementedError, ext.extract, '')
 
 
+class MatcherTestCase(unittest.TestCase):
+    """Tests for the combined single pass matcher."""
+    ref = datetime.datetime.utcfromtimestamp(259200000)
+
+    def setUp(self):
+        self.extractors = [ChristmasExtractor(self.ref),
+                           ISO8601Extractor(self.ref),
+                           RelativeDayExtractor(self.ref)]
+        self.matcher = Matcher(self.extractors)
+        self.context = reference_day(self.ref)
+
+    def test_text_order(self):
+        """Matches of all extractors come back in text order."""
+        today = self.ref.date()
+        text = "tomorrow, not 1990-01-01T10 or christmas eve but in 3 days"
+        self.assertEqual([today + datetime.timedelta(days=1),
+                          datetime.datetime(1990, 1, 1, 10),
+                          datetime.date(self.ref.year, 12, 24),
+                          today + datetime.timedelta(days=3)],
+                         self.matcher.extract(text, self.context))
+
+    def test_same_as_extract(self):
+        """Each extractor finds the same values as its own extract."""
+        text = "last friday, next week, 2 months ago and day after tomorrow"
+        expected = self.extractors[2].extract(text)
+        self.assertEqual(sorted(expected), sorted(self.matcher.extract(text, self.context)))
+
+    def test_mixed_case(self):
+        """Case is ignored by the relative handlers too."""
+        today = self.ref.date()
+        self.assertEqual([today + datetime.timedelta(days=3),
+                          today - datetime.timedelta(weeks=1)],
+                         self.matcher.extract("In 3 Days and Last Week", self.context))
+
+    def test_overlap(self):
+        """Extractors scan on their own, their hits may overlap."""
+        text = "1990-01-01 days ago"
+        self.assertEqual([datetime.datetime(1990, 1, 1),
+                          self.ref.date() - datetime.timedelta(days=1)],
+                         self.matcher.extract(text, self.context))
+        self.assertEqual(['iso8601', 'relative_day'],
+                         [m.kind for m in self.matcher.matches(text, self.context)])
+
+    def test_empty(self):
+        """No extractors with rules means no matches."""
+        self.assertEqual([], Matcher([]).extract("foo today bar"))
+
+
+class ScopedTestCase(unittest.TestCase):
+    """Tests for merging rule patterns with their flags."""
+
+    def matcher(self, pattern):
+        class RuleExtractor(Extractor):
+            name = 'test_rule'
+            rules = [(pattern, lambda match, context: match)]
+
+        return Matcher([RuleExtractor()])
+
+    def test_flags(self):
+        """Verbose patterns may end with a comment, ASCII is kept."""
+        matcher = self.matcher(re.compile(r"quarter   # a word", re.VERBOSE))
+        self.assertEqual(['quarter'], matcher.extract("last quarter"))
+        matcher = self.matcher(re.compile(r"\w+", re.ASCII))
+        self.assertEqual(['caf', 'x'], matcher.extract("caf\xe9 x"))
+
+    def test_group_references(self):
+        """Patterns referring to their own groups are refused."""
+        for source in [r"(a)\1", r"(?P<a>a)", r"(a)(?(1)b)"]:
+            self.assertRaises(ValueError, self.matcher, re.compile(source))
+        self.assertEqual(['\\1'], self.matcher(re.compile(r"\\1")).extract("a\\1"))
+
+
+class TokenMatcherTestCase(MatcherTestCase):
+    """The matcher over tokens gives the same results."""
+
+    def setUp(self):
+        super(TokenMatcherTestCase, self).setUp()
+        self.matcher = TokenMatcher(self.extractors)
+
+    def test_phrase(self):
+        """Phrases are elements of alternative words, '?' if optional."""
+        self.assertEqual([(['next', 'in'], True, False), (['#'], False, False)],
+                         parse_phrase('next|in? #'))
+        self.assertEqual([(['ago', 'back'], True, True)], parse_phrase('~ago|back?'))
+
+    def test_spans(self):
+        """Phrases span from their first to their last token."""
+        text = "a week back, not 2013-01-05T19 day before yesterday"
+        matches = self.matcher.matches(text, self.context)
+        self.assertEqual(['a week back', '2013-01-05T19', 'day before yesterday'],
+                         [m.text for m in matches])
+        self.assertEqual(['relative_day', 'iso8601', 'relative_day'],
+                         [m.kind for m in matches])
+
+    def test_word_boundaries(self):
+        """Tokens are whole words, also when scanning from the middle of one."""
+        self.assertEqual([], self.matcher.extract("todays nextweek", self.context))
+        self.assertEqual([], self.matcher.matches("yesterday", self.context, pos=3))
+
+
+class RegistryTestCase(unittest.TestCase):
+    """Tests for the explicit extractor registry."""
+
+    def tearDown(self):
+        registry.pop('test_always', None)
+
+    def test_names(self):
+        """Built-in extractors are registered by name, in order."""
+        self.assertEqual(['holiday', 'iso8601', 'relative_day'],
+                         extractor_names())
+        self.assertTrue(get_extractor('iso8601') is ISO8601Extractor)
+        self.assertRaises(ValueError, get_extractor, 'nope')
+
+    def test_subclass(self):
+        """Subclasses only take part in parses once registered."""
+        class AlwaysExtractor(Extractor):
+            name = 'test_always'
+
+            def extract(self, text):
+                return ['always']
+
+        self.assertEqual([], Parser().parse("nothing here"))
+        register('test_always', AlwaysExtractor)
+        self.assertEqual(['always'], Parser().parse("nothing here"))
+        self.assertEqual(['always'], Parser(['test_always']).parse("today"))
+
+    def test_extract_ref(self):
+        """Extractors implementing extract(self, text) get the ref of each call."""
+        class RefExtractor(Extractor):
+            name = 'test_ref'
+
+            def extract(self, text):
+                return [self.ref]
+
+        class FlagsExtractor(Extractor):
+            name = 'test_flags'
+
+            def extract(self, text, flags=None):
+                return [(self.ref, flags)]
+
+        parser = Parser([RefExtractor])
+        ref = datetime.datetime(2001, 2, 3, 4, 5)
+        self.assertEqual([ref], parser.parse("nothing here", ref))
+        self.assertEqual([(ref, None)], Parser([FlagsExtractor]).parse("nothing here", ref))
+        self.assertEqual(ref, parser.parse_first("nothing here", ref))
+        self.assertEqual([[ref]], parser.parse_many(["nothing here"], ref))
+        self.assertEqual([ref], parser.parse("nothing here", ref, budget_ms=10000))
+        self.assertEqual([None], parser.parse("nothing here"))
+
+    def test_subset(self):
+        """Parsers built from names only use those extractors."""
+        parser = Parser(['iso8601']).warmup()
+        self.assertEqual(['iso8601'], [e.name for e in parser.extractors])
+        self.assertEqual([datetime.datetime(1990, 1, 1)],
+                         parser.parse("christmas on 1990-01-01"))
+
+
 if __name__ == '__main__': # pragma: no cover
     unittest.main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Shared tokenization pass and phrase matching over tokens.
+
+The text is case folded and split into words, numbers and single
+punctuation characters once. Every token is then replaced by a small id
+from the vocabulary of the phrases in use, words outside of it all share
+the id `OTHER`. Extractors list their phrases in `token_rules` and these
+are matched by walking a trie of token ids, without any regex.
+
+Phrases follow the same rules as the regexes they stand for: their tokens
+are separated by exactly one space and they start and end at a word
+boundary, so "3days", "next\tfriday" or "days_ago" match in neither.
+"""
+
+import re
+import heapq
+import itertools
+
+from .matcher import Matcher
+
+
+TOKEN_PATTERN = re.compile(r"(\d+)|([^\W\d_]+|\S)")
+
+# Rest of a word or number cut in half at the start position
+CONTINUATION = re.compile(r"(?<=\d)\d+|(?<=[^\W\d_])[^\W\d_]+")
+
+# A character which does not make a word boundary, as for \b
+WORD = re.compile(r"\w")
+
+OTHER = 0
+NUMBER = 1
+
+
+def parse_phrase(phrase):
+    """Split a phrase into a list of (words, optional) elements.
+
+    Elements are separated by spaces. An element lists its words separated
+    by '|', '#' stands for any number and a trailing '?' makes it optional.
+    A leading '~' makes the space before the element optional, like ' ?'
+    in a regex:
+
+        'next|in? ~#|a day|days ~ago|back?'
+
+    Every element is returned as a (words, optional, glued) tuple.
+    """
+    elements = []
+    for element in phrase.split():
+        optional = element.endswith('?')
+        glued = element.startswith('~')
+        elements.append((element.strip('?~').split('|'), optional, glued))
+    return elements
+
+
+class TokenSpan(object):
+    """Position of a phrase, with the methods of a regex match used by parsers."""
+    __slots__ = ('text', 'span_start', 'span_end')
+
+    def __init__(self, text, start, end):
+        self.text = text
+        self.span_start = start
+        self.span_end = end
+
+    def start(self):
+        return self.span_start
+
+    def end(self):
+        return self.span_end
+
+    def span(self):
+        return self.span_start, self.span_end
+
+    def group(self):
+        return self.text[self.span_start:self.span_end]
+
+
+class TokenMatcher(Matcher):
+    """Matcher which runs the `token_rules` of extractors over tokens.
+
+    Extractors without token rules are scanned with their regex `rules` in
+    a regular `Matcher`. Every other extractor has a trie of its own, walked
+    over tokens split only once, and all hits are merged in text order like
+    those of a `Matcher`. At every token the longest phrase of an extractor
+    wins, then the first rule listed.
+
+    Edges of the trie are keyed by token id << 1, plus one when the token
+    directly follows the previous one instead of after a space. Words which
+    may be written together, like "daysago", get a token of their own.
+    """
+
+    def __init__(self, extractors, wrap=None):
+        extractors = list(extractors)
+        self.kinds = [extractor.name for extractor in extractors]
+        self.order = dict((kind, i) for i, kind in enumerate(self.kinds))
+        self.regex = Matcher([e for e in extractors if not e.token_rules], wrap)
+        self.vocabulary = {}
+        # Words of the tokens standing for several words, by token id
+        self.joined = {}
+        # (extractor name, trie of token ids), every node is [children, accept]
+        self.tries = []
+
+        for extractor in extractors:
+            if not extractor.token_rules:
+                continue
+            root = [{}, None]
+            for phrase, handler in extractor.token_rules:
+                if wrap is not None:
+                    handler = wrap(extractor.name, handler)
+                self.add(root, extractor.name, phrase, handler)
+            self.tries.append((extractor.name, root))
+
+    def add(self, root, kind, phrase, handler):
+        """Add every sequence of words matched by a phrase to a trie."""
+        elements = parse_phrase(phrase)
+        size = len(elements)
+        # Every combination of the optional elements is a separate path, so
+        # that paths of different phrases never share nodes by accident
+        choices = [(True, False) if optional else (True,)
+                   for words, optional, glued in elements]
+        for present in itertools.product(*choices):
+            slots = tuple(i for i in range(size) if present[i])
+            if not slots:
+                continue
+            # The first element never needs a space before it
+            glues = [False] + [elements[i][2] for i in slots[1:]]
+            for words in itertools.product(*(elements[i][0] for i in slots)):
+                for path in self.paths(words, glues):
+                    node = root
+                    for edge in path:
+                        node = node[0].setdefault(edge, [{}, None])
+                    if node[1] is None:
+                        node[1] = (kind, handler, slots, size)
+
+    def paths(self, words, glues):
+        """Yield every sequence of trie edges spelling the words.
+
+        Where glues allows it, a word follows the previous one either after
+        a space or right after it, which makes a token of its own next to a
+        number and a single token joining both words otherwise.
+        """
+        # Lists of (words of a token, whether it may follow without space)
+        groups = [[]]
+        for word, glued in zip(words, glues):
+            extended = []
+            for group in groups:
+                extended.append(group + [((word,), glued)])
+                if glued and '#' not in (word, group[-1][0][-1]):
+                    joined, before = group[-1]
+                    extended.append(group[:-1] + [(joined + (word,), before)])
+            groups = extended
+
+        for group in groups:
+            choices = []
+            for k, (token_words, glued) in enumerate(group):
+                token = self.token(token_words)
+                if k and glued and '#' in (token_words[0], group[k - 1][0][-1]):
+                    choices.append((token << 1, token << 1 | 1))
+                else:
+                    choices.append((token << 1,))
+            for path in itertools.product(*choices):
+                yield path
+
+    def token(self, words):
+        """Return the token id of a tuple of phrase words spelled together."""
+        if words == ('#',):
+            return NUMBER
+        token = self.vocabulary.setdefault(''.join(words), len(self.vocabulary) + 2)
+        if len(words) > 1:
+            self.joined[token] = words
+        return token
+
+    def finditer(self, text, pos=0, starts=None):
+        """Yield (match, kind, handler, match) like `Matcher.finditer`.
+
+        Phrase hits come with a `TokenSpan` instead of a regex match object.
+        """
+        hits = self.regex.finditer(text, pos, starts)
+        if not self.tries:
+            for hit in hits:
+                yield hit
+            return
+
+        folded = text.lower()
+        if len(folded) != len(text):
+            # A few characters grow when lowered, keep the offsets of text
+            folded = None
+        source = text if folded is None else folded
+
+        if pos:
+            continued = CONTINUATION.match(source, pos)
+            if continued is not None:
+                pos = continued.end()
+
+        get = self.vocabulary.get
+        tokens = TOKEN_PATTERN.findall(source, pos)
+        if folded is None:
+            ids = [NUMBER if number else get(word.lower(), OTHER) for number, word in tokens]
+        else:
+            ids = [NUMBER if number else get(word, OTHER) for number, word in tokens]
+
+        scans = []
+        spans = None
+        for kind, root in self.tries:
+            first = root[0]
+            found = [i for i, token in enumerate(ids) if token << 1 in first]
+            if not found:
+                continue
+            if spans is None:
+                # Offsets are only worked out for texts with a phrase in them
+                spans = [m.span() for m in TOKEN_PATTERN.finditer(source, pos)]
+            if starts is not None and starts.get(kind, pos) > pos:
+                begin = starts[kind]
+                found = [i for i in found if spans[i][0] >= begin]
+            scans.append(self.phrases(text, source, folded, tokens, ids, spans, found, root))
+
+        if not scans:
+            for hit in hits:
+                yield hit
+            return
+        order = self.order
+        for hit in heapq.merge(hits, *scans, key=lambda hit: (hit[0].start(), order[hit[1]])):
+            yield hit
+
+    def phrases(self, text, source, folded, tokens, ids, spans, starts, root):
+        """Yield the hits of the phrases of a trie starting at the given tokens."""
+        root = root[0]
+        count = len(ids)
+        size = len(source)
+        joined = self.joined
+        word = WORD.match
+        i = 0
+        for start in starts:
+            if start < i:
+                continue
+            begin = spans[start][0]
+            if begin and word(source, begin - 1):
+                continue
+
+            node = root[ids[start] << 1]
+            accepted = None
+            j = start + 1
+            while True:
+                end = spans[j - 1][1]
+                if node[1] is not None:
+                    if end == size or not word(source, end):
+                        accepted = node[1], j
+                if j == count:
+                    break
+                gap = spans[j][0] - end
+                if gap == 1 and source[end] == ' ':
+                    node = node[0].get(ids[j] << 1)
+                elif gap == 0:
+                    node = node[0].get(ids[j] << 1 | 1)
+                else:
+                    break
+                if node is None:
+                    break
+                j += 1
+            if accepted is None:
+                continue
+
+            (kind, handler, slots, elements), i = accepted
+            words = []
+            for k in range(start, i):
+                number, text_word = tokens[k]
+                if number:
+                    words.append(number)
+                elif ids[k] in joined:
+                    words.extend(joined[ids[k]])
+                elif folded is None:
+                    words.append(text_word.lower())
+                else:
+                    words.append(text_word)
+            if elements == 1:
+                match = words[0]
+            else:
+                match = [''] * elements
+                for slot, value in zip(slots, words):
+                    match[slot] = value
+                match = tuple(match)
+
+            yield TokenSpan(text, begin, spans[i - 1][1]), kind, handler, match
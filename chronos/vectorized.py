@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Parse NumPy arrays and pandas Series, once per distinct value, and
+resolve matches for many reference dates at once.
+
+NumPy and pandas are optional, they are only imported when the input or the
+requested output needs them.
+"""
+
+import datetime
+
+from .columnar import to_microseconds, EPOCH_ORDINAL, DAY
+from .reference import reference_day, WEEKDAYS, UNIT_DAYS
+from .symbolic import Absolute, RelativeOffset, Weekday, Holiday
+
+
+# Smallest int64, which NumPy reads as NaT in a datetime64 array
+NAT = -2 ** 63
+
+
+def factorize(values):
+    """Return (codes, uniques) so that values[i] == uniques[codes[i]].
+
+    Anything which is not a string, like None or NaN, is counted as None.
+    """
+    index = {}
+    codes = []
+    append = codes.append
+    for value in values:
+        if not isinstance(value, str):
+            value = None
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(index)
+        append(code)
+    return codes, list(index)
+
+
+def is_pandas(values):
+    return type(values).__module__.split('.')[0] == 'pandas'
+
+
+def is_numpy(values):
+    return type(values).__module__.split('.')[0] == 'numpy'
+
+
+def parse_array(values, ref=None, first=False, parser=None):
+    """Parse a column of strings, running the extractors once per distinct value.
+
+    values may be a list, a NumPy object array or a pandas Series. Results
+    are computed for every distinct string only and then broadcast back,
+    so a column of mostly repeated values costs O(unique) parses.
+
+    By default every row gets a tuple of its dates; rows with the same text
+    share the same tuple. With first, only the first date of every row is
+    kept in a NumPy ``datetime64[us]`` array, NaT where none was found, with
+    aware datetimes converted to UTC.
+
+    A list comes back for a list, a NumPy array for a NumPy array and a
+    Series with the same index for a Series.
+    """
+    if parser is None:
+        from .api import default_parser as parser
+
+    codes, uniques = factorize(values)
+    results = parser.parse_many(uniques, ref)
+
+    if first:
+        import numpy
+        table = numpy.array([to_microseconds(result[0]) if result else NAT
+                             for result in results], dtype=numpy.int64)
+        out = table[numpy.asarray(codes, dtype=numpy.intp)].view('datetime64[us]')
+    else:
+        table = [tuple(result) for result in results]
+        out = [table[code] for code in codes]
+        if is_numpy(values) or is_pandas(values):
+            import numpy
+            column = numpy.empty(len(out), dtype=object)
+            for i, dates in enumerate(out):
+                column[i] = dates
+            out = column
+
+    if is_pandas(values):
+        import pandas
+        return pandas.Series(out, index=values.index, name=values.name)
+    return out
+
+
+def parse_at_refs(texts, refs, parser=None):
+    """Match a text once and resolve its dates for every reference in refs.
+
+    Returns a matrix with a row per reference and a column per symbol of
+    `Parser.parse_symbolic`, in text order: a NumPy ``datetime64[us]`` array
+    with NaT where a match has no date, or without NumPy a list of rows of
+    dates and None. Given a list of texts, returns a list of such matrices.
+    """
+    if parser is None:
+        from .api import default_parser as parser
+
+    refs = list(refs)
+    if isinstance(texts, str) or texts is None:
+        return resolve_at_refs(parser.parse_symbolic(texts), refs)
+    return [resolve_at_refs(parser.parse_symbolic(text), refs) for text in texts]
+
+
+def resolve_at_refs(symbols, refs):
+    """Resolve symbols for every reference, see `parse_at_refs`."""
+    try:
+        import numpy
+    except ImportError:
+        rows = []
+        for ref in refs:
+            context = reference_day(ref)
+            rows.append([symbol.resolve(context) for symbol in symbols])
+        return rows
+
+    days = [(ref or datetime.date.today()) for ref in refs]
+    ordinals = numpy.array([day.toordinal() for day in days], dtype=numpy.int64)
+    years = numpy.array([day.year for day in days], dtype=numpy.int64)
+    # Monday is 0, like date.weekday()
+    weekdays = (ordinals + 6) % 7
+    out = numpy.full((len(refs), len(symbols)), NAT, dtype=numpy.int64)
+
+    for column, symbol in enumerate(symbols):
+        if isinstance(symbol, Absolute):
+            out[:, column] = to_microseconds(symbol.value)
+            continue
+
+        if isinstance(symbol, RelativeOffset):
+            result = ordinals + symbol.amount * UNIT_DAYS[symbol.unit]
+        elif isinstance(symbol, Weekday):
+            day = WEEKDAYS.index(symbol.day)
+            # Same rules as the tables of `ReferenceDay`
+            if symbol.direction == 'last':
+                delta = numpy.where(weekdays > day, weekdays - day,
+                                    numpy.where(weekdays == day, 7, 7 - weekdays))
+                result = ordinals - delta
+            else:
+                delta = numpy.where(weekdays >= day, 7 + day - weekdays, day - weekdays)
+                result = ordinals + delta
+        elif isinstance(symbol, Holiday):
+            unique, inverse = numpy.unique(years, return_inverse=True)
+            table = numpy.array([symbol.on(int(year)).toordinal() for year in unique],
+                                dtype=numpy.int64)
+            result = table[inverse.reshape(-1)]
+        else:
+            # Any other symbol is resolved one reference at a time
+            out[:, column] = [to_microseconds(value) if value is not None else NAT
+                              for value in (symbol.resolve(reference_day(ref)) for ref in refs)]
+            continue
+        out[:, column] = (result - EPOCH_ORDINAL) * DAY
+
+    return out.view('datetime64[us]')